@@ -1,13 +1,14 @@
+import argparse
+import os
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from report import Task, build_report
+
 ### US PATENTS
-def plot_nodes_edges(file_path:str):
-    # Load data
-    df = pd.read_csv(file_path, sep=';')
-    # Sort by year
-    df = df.sort_values(by="Year")
+def plot_nodes_edges(df: pd.DataFrame, output_filepath: str):
     fig, ax = plt.subplots()
     # Plot the data
     x = df["Year"].tolist()
@@ -26,15 +27,11 @@ def plot_nodes_edges(file_path:str):
     # Add a legend
     ax.legend()
     # Save the plot to a PDF file
-    plt.savefig(file_path.replace(".csv", ".pdf"))
+    plt.savefig(output_filepath)
     # close plt
     plt.close()
 
-def plot_average_cc(file_path: str):
-    # Load data
-    df = pd.read_csv(file_path, sep=';')
-    # Sort by year
-    df = df.sort_values(by="Year")
+def plot_average_cc(df: pd.DataFrame, output_filepath: str):
     fig, ax = plt.subplots()
     # Plot the data
     x = df["Year"].tolist()
@@ -49,15 +46,11 @@ def plot_average_cc(file_path: str):
     # Add a legend
     ax.legend()
     # Save the plot to a PDF file
-    plt.savefig(file_path.replace(".csv", ".pdf"))
+    plt.savefig(output_filepath)
     # close plt
     plt.close()
 
-def plot_most_cited_patents(file_path: str):
-    # Load data
-    df = pd.read_csv(file_path, sep=';')
-    # Sort by year
-    df = df.sort_values(by="Year")
+def plot_most_cited_patents(df: pd.DataFrame, output_filepath: str):
     fig, ax = plt.subplots()
     # Plot the data
     x = df["Year"].tolist()
@@ -79,15 +72,11 @@ def plot_most_cited_patents(file_path: str):
     # Add a legend
     ax.legend()
     # Save the plot to a PDF file
-    plt.savefig(file_path.replace(".csv", ".pdf"))
+    plt.savefig(output_filepath)
     # close plt
     plt.close()
 
-def plot_average_degree(file_path: str):
-    # Load data
-    df = pd.read_csv(file_path, sep=';')
-    # Sort by year
-    df = df.sort_values(by="Year")
+def plot_average_degree(df: pd.DataFrame, output_filepath: str):
     fig, ax = plt.subplots()
     # Plot the data
     x = df["Year"].tolist()
@@ -102,16 +91,12 @@ def plot_average_degree(file_path: str):
     # Add a legend
     ax.legend()
     # Save the plot to a PDF file
-    plt.savefig(file_path.replace(".csv", ".pdf"))
+    plt.savefig(output_filepath)
     # close plt
     plt.close()
 
 # Yahoo
-def plot_average_degree_w_degree(file_path: str):
-    # Load data
-    df = pd.read_csv(file_path, sep=';')
-    # Sort by year
-    df = df.sort_values(by="Year")
+def plot_average_degree_w_degree(df: pd.DataFrame, output_filepath: str):
     fig, ax = plt.subplots()
     # Plot the data
     x = df["Year"].tolist()
@@ -128,15 +113,11 @@ def plot_average_degree_w_degree(file_path: str):
     # Add a legend
     ax.legend()
     # Save the plot to a PDF file
-    plt.savefig(file_path.replace(".csv", ".pdf"))
+    plt.savefig(output_filepath)
     # close plt
     plt.close()
 
-def plot_nodes_with_max_degree(file_path: str):
-    # Load data
-    df = pd.read_csv(file_path, sep=';')
-    # Sort by year
-    df = df.sort_values(by="Year")
+def plot_nodes_with_max_degree(df: pd.DataFrame, output_filepath: str):
     fig, ax = plt.subplots()
     # Plot the data
     x = df["Year"].tolist()
@@ -158,14 +139,10 @@ def plot_nodes_with_max_degree(file_path: str):
     # Add a legend
     ax.legend()
     # Save the plot to a PDF file
-    plt.savefig(file_path.replace(".csv", ".pdf"))
+    plt.savefig(output_filepath)
     # close plt
     plt.close()
-def plot_density(file_path: str):
-    # Load data
-    df = pd.read_csv(file_path, sep=';')
-    # Sort by year
-    df = df.sort_values(by="Year")
+def plot_density(df: pd.DataFrame, output_filepath: str):
     fig, ax = plt.subplots()
     # Plot the data
     x = df["Year"].tolist()
@@ -180,12 +157,11 @@ def plot_density(file_path: str):
     # Add a legend
     ax.legend()
     # Save the plot to a PDF file
-    plt.savefig(file_path.replace(".csv", ".pdf"))
+    plt.savefig(output_filepath)
     # close plt
     plt.close()
 
-def plot_boxplots(input_filepath: str):
-    df = pd.read_csv(input_filepath, sep=';')
+def plot_boxplots(df: pd.DataFrame, output_filepath: str):
     #df = df.loc[(df.k == k)]
     #df['combined'] = "k=" + df['k'].astype(str) + ', ' + "c=" + df['c'].astype(str)
 
@@ -195,21 +171,37 @@ def plot_boxplots(input_filepath: str):
     plt.title("Ratio of \"infected\" portion of nodes.")
     plt.grid(True)
     # Save the plot to a PDF file
-    plt.savefig(input_filepath.replace(".csv", ".pdf"))
+    plt.savefig(output_filepath)
     plt.close()
 
 
-if __name__ == '__main__':
+# Figures of report, inputs and outputs are relative to data root
+US_PATENTS = "Project_USPatents/Outputs"
+YAHOO = "Project_Yahoo/Outputs"
+TASKS = [
     # US Patents.
-    plot_average_degree(r"C:\Users\ptaku\vsb_fei\MAS2\Project_USPatents\Project_USPatents\bin\Data\Outputs\averageOutDegrees.csv")
-    plot_nodes_edges(r"C:\Users\ptaku\vsb_fei\MAS2\Project_USPatents\Project_USPatents\bin\Data\Outputs\nodesAndEdges.csv")
-    plot_average_cc(r"C:\Users\ptaku\vsb_fei\MAS2\Project_USPatents\Project_USPatents\bin\Data\Outputs\averageClusteringCoefficient.csv")
-    plot_most_cited_patents(r"C:\Users\ptaku\vsb_fei\MAS2\Project_USPatents\Project_USPatents\bin\Data\Outputs\mostCitedPatents_old.csv")
+    Task("us_average_degree", plot_average_degree, [f"{US_PATENTS}/averageOutDegrees.csv"], f"{US_PATENTS}/averageOutDegrees.pdf"),
+    Task("us_nodes_edges", plot_nodes_edges, [f"{US_PATENTS}/nodesAndEdges.csv"], f"{US_PATENTS}/nodesAndEdges.pdf"),
+    Task("us_average_cc", plot_average_cc, [f"{US_PATENTS}/averageClusteringCoefficient.csv"], f"{US_PATENTS}/averageClusteringCoefficient.pdf"),
+    Task("us_most_cited_patents", plot_most_cited_patents, [f"{US_PATENTS}/mostCitedPatents_old.csv"], f"{US_PATENTS}/mostCitedPatents_old.pdf"),
 
     # Yahooo.
-    plot_average_degree_w_degree(r"C:\Users\ptaku\vsb_fei\MAS2\Project_Yahoo\Project_Yahoo\bin\Data\Outputs\averageOutDegrees.csv")
-    plot_nodes_edges(r"C:\Users\ptaku\vsb_fei\MAS2\Project_Yahoo\Project_Yahoo\bin\Data\Outputs\nodesAndEdges.csv")
-    plot_average_cc(r"C:\Users\ptaku\vsb_fei\MAS2\Project_Yahoo\Project_Yahoo\bin\Data\Outputs\averageClusteringCoefficient.csv")
-    plot_nodes_with_max_degree(r"C:\Users\ptaku\vsb_fei\MAS2\Project_Yahoo\Project_Yahoo\bin\Data\Outputs\maxOutDegrees.csv")
-    plot_density(r"C:\Users\ptaku\vsb_fei\MAS2\Project_Yahoo\Project_Yahoo\bin\Data\Outputs\density.csv")
-    plot_boxplots(r"C:\Users\ptaku\vsb_fei\MAS2\Project_Yahoo\Project_Yahoo\bin\Data\Outputs\influence.csv")
+    Task("yahoo_average_degree", plot_average_degree_w_degree, [f"{YAHOO}/averageOutDegrees.csv"], f"{YAHOO}/averageOutDegrees.pdf"),
+    Task("yahoo_nodes_edges", plot_nodes_edges, [f"{YAHOO}/nodesAndEdges.csv"], f"{YAHOO}/nodesAndEdges.pdf"),
+    Task("yahoo_average_cc", plot_average_cc, [f"{YAHOO}/averageClusteringCoefficient.csv"], f"{YAHOO}/averageClusteringCoefficient.pdf"),
+    Task("yahoo_nodes_with_max_degree", plot_nodes_with_max_degree, [f"{YAHOO}/maxOutDegrees.csv"], f"{YAHOO}/maxOutDegrees.pdf"),
+    Task("yahoo_density", plot_density, [f"{YAHOO}/density.csv"], f"{YAHOO}/density.pdf"),
+    Task("yahoo_influence", plot_boxplots, [f"{YAHOO}/influence.csv"], f"{YAHOO}/influence.pdf"),
+]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Builds figures of report, only those whose input CSVs changed since last build.")
+    parser.add_argument("--data-root", default=os.environ.get("MAS2_DATA_ROOT", "Data"),
+                        help="directory with Project_USPatents/Outputs and Project_Yahoo/Outputs (default $MAS2_DATA_ROOT or Data)")
+    parser.add_argument("--workers", type=int, default=None, help="number of processes rendering figures")
+    parser.add_argument("--force", action="store_true", help="rebuild all figures")
+    arguments = parser.parse_args()
+
+    rendered, skipped = build_report(TASKS, arguments.data_root, arguments.workers, arguments.force)
+    print(f"Rendered: {len(rendered)}, up to date: {len(skipped)}")
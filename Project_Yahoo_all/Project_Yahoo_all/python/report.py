@@ -0,0 +1,94 @@
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# Hashes of inputs of every task at its last successful build, stored under data root
+MANIFEST_FILENAME = ".report_manifest.json"
+
+
+class Task:
+    def __init__(self, name: str, function, inputs: list, output: str):
+        # function(*data frames of inputs, output_filepath) renders one figure, paths are relative to data root
+        self.name = name
+        self.function = function
+        self.inputs = inputs
+        self.output = output
+
+
+def load_manifest(data_root: str):
+    try:
+        with open(os.path.join(data_root, MANIFEST_FILENAME), "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(data_root: str, manifest: dict):
+    with open(os.path.join(data_root, MANIFEST_FILENAME), "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+
+
+def read_bytes(data_root: str, inputs: set):
+    # Contents of input files, missing files are left out
+    contents = {}
+    for path in inputs:
+        try:
+            with open(os.path.join(data_root, path), "rb") as file:
+                contents[path] = file.read()
+        except OSError:
+            continue
+    return contents
+
+
+def parse_csv(content: bytes):
+    # CSV is parsed once and sorted by year once, every figure gets the same data frame
+    df = pd.read_csv(io.BytesIO(content), sep=';')
+    if "Year" in df.columns:
+        df = df.sort_values(by="Year")
+    return df
+
+
+def run_task(task: Task, data_frames: list, output_filepath: str):
+    import matplotlib
+    matplotlib.use("Agg")
+    task.function(*data_frames, output_filepath)
+    return task.name
+
+
+def build_report(tasks: list, data_root: str, max_workers: int = None, force: bool = False):
+    # Renders figures whose inputs changed since last build (by content hash) or whose output is missing,
+    # independent figures in parallel. Returns names of rendered and skipped tasks.
+    manifest = {} if force else load_manifest(data_root)
+    contents = read_bytes(data_root, {path for task in tasks for path in task.inputs})
+    hashes = {path: hashlib.sha256(content).hexdigest() for path, content in contents.items()}
+
+    stale = []
+    skipped = []
+    for task in tasks:
+        if any(path not in contents for path in task.inputs):
+            print(f"Skipping {task.name}, missing input {[path for path in task.inputs if path not in contents]}")
+            continue
+        task_hashes = {path: hashes[path] for path in task.inputs}
+        if manifest.get(task.name) == task_hashes and os.path.exists(os.path.join(data_root, task.output)):
+            skipped.append(task.name)
+        else:
+            stale.append(task)
+
+    # Each input is loaded once, even if more figures use it
+    data_frames = {path: parse_csv(contents[path]) for path in {path for task in stale for path in task.inputs}}
+
+    rendered = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run_task, task, [data_frames[path] for path in task.inputs], os.path.join(data_root, task.output))
+                   for task in stale]
+        for task, future in zip(stale, futures):
+            future.result()
+            manifest[task.name] = {path: hashes[path] for path in task.inputs}
+            rendered.append(task.name)
+            # Saved after every figure, so finished figures are not rebuilt if later one fails
+            save_manifest(data_root, manifest)
+    return rendered, skipped
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# Points of one log-log plot, whatever the number of vertices
+NUMBER_OF_BINS = 40
+
+
+def log_bin_edges(degrees: np.ndarray, number_of_bins: int = NUMBER_OF_BINS):
+    # Integer edges growing geometrically from the smallest to the largest positive degree, bin i holds
+    # degrees edges[i] <= degree < edges[i + 1]. Small degrees whose bins would be narrower than 1 share one edge.
+    low, high = degrees.min(), degrees.max() + 1
+    return np.unique(np.floor(np.geomspace(low, high, number_of_bins + 1)).astype(np.int64))
+
+
+def assign_bins(degrees: np.ndarray, number_of_bins: int = NUMBER_OF_BINS):
+    # Bin of every degree and geometric centre of every bin
+    edges = log_bin_edges(degrees, number_of_bins)
+    bins = np.searchsorted(edges, degrees, side="right") - 1
+    centres = np.sqrt(edges[:-1] * (edges[1:] - 1))
+    return bins, centres, edges
+
+
+def bin_degree_distribution(degrees: np.ndarray, counts: np.ndarray = None, number_of_bins: int = NUMBER_OF_BINS):
+    # Degree distribution in logarithmic bins. degrees is degree of every vertex, or with counts a table of
+    # degree and number of vertices with it. Probability is per one degree of bin, so it is comparable with P(k).
+    degrees = np.asarray(degrees, dtype=np.int64)
+    counts = np.ones(degrees.size, dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+    # Degree 0 does not fit on log scale
+    positive = degrees > 0
+    degrees, counts = degrees[positive], counts[positive]
+    if degrees.size == 0:
+        return pd.DataFrame({"Degree": [], "Count": [], "Probability": []})
+
+    bins, centres, edges = assign_bins(degrees, number_of_bins)
+    bin_counts = np.bincount(bins, weights=counts, minlength=centres.size).astype(np.int64)
+    probabilities = bin_counts / (counts.sum() * np.diff(edges))
+    non_empty = bin_counts > 0
+    return pd.DataFrame({"Degree": centres[non_empty], "Count": bin_counts[non_empty], "Probability": probabilities[non_empty]})
+
+
+def bin_clustering_effect(degrees: np.ndarray, clustering_coefficients: np.ndarray, number_of_bins: int = NUMBER_OF_BINS,
+                          percentiles: tuple = (25, 50, 75)):
+    # Count, mean and percentiles of clustering coefficient in logarithmic bins of degree, one row per non-empty bin.
+    # Rows are a vertex each, or a degree each when read from clusteringEffect.csv. NaN coefficients are left out.
+    degrees = np.asarray(degrees, dtype=np.int64)
+    clustering_coefficients = np.asarray(clustering_coefficients, dtype=np.float64)
+    valid = (degrees > 0) & ~np.isnan(clustering_coefficients)
+    degrees, clustering_coefficients = degrees[valid], clustering_coefficients[valid]
+    columns = ["Degree", "Count", "Mean"] + [f"P{percentile}" for percentile in percentiles]
+    if degrees.size == 0:
+        return pd.DataFrame({column: [] for column in columns})
+
+    bins, centres, _ = assign_bins(degrees, number_of_bins)
+    counts = np.bincount(bins, minlength=centres.size)
+    means = np.bincount(bins, weights=clustering_coefficients, minlength=centres.size) / np.maximum(counts, 1)
+
+    # Values sorted within bins, percentile of bin is linear interpolation between two of them, the same as np.percentile
+    values = clustering_coefficients[np.lexsort((clustering_coefficients, bins))]
+    starts = np.cumsum(counts) - counts
+    non_empty = counts > 0
+    table = {"Degree": centres[non_empty], "Count": counts[non_empty], "Mean": means[non_empty]}
+    for percentile in percentiles:
+        positions = starts[non_empty] + (counts[non_empty] - 1) * percentile / 100
+        below = np.floor(positions).astype(np.int64)
+        above = np.minimum(below + 1, starts[non_empty] + counts[non_empty] - 1)
+        fractions = positions - below
+        table[f"P{percentile}"] = values[below] * (1 - fractions) + values[above] * fractions
+    return pd.DataFrame(table)
@@ -1,27 +1,40 @@
 import pandas as pd
+import numpy as np
 import seaborn as sns
 import matplotlib
 import os
 import matplotlib.pyplot as plt
 
-def plot_clustering_effect(filepath_input: str, filepath_output: str):
-    df = pd.read_csv(filepath_input, header=0, delimiter=";")
-    # Scatter Plot
+from log_binning import NUMBER_OF_BINS, bin_clustering_effect, bin_degree_distribution
+
+def plot_binned_clustering_effect(df: pd.DataFrame, filepath_output: str):
+    # One point per bin of degree with mean clustering coefficient, band between 25th and 75th percentile
     plt.figure(figsize=(8, 6))
-    sns.scatterplot(data=df, x="Degree", y="AvgClusteringCoef", )
+    plt.fill_between(df["Degree"], df["P25"], df["P75"], alpha=0.3, label="25th - 75th percentile")
+    sns.scatterplot(data=df, x="Degree", y="Mean", label="Mean")
     plt.title("Clustering Effect (Log-Log scale)")
     plt.xscale("log")
     plt.yscale("log")
+    plt.ylabel("AvgClusteringCoef")
+    plt.legend()
     plt.grid(True)
     plt.savefig(filepath_output, format="pdf")
     plt.close()
 
-def plot_degree_distribution(filepath_input: str, filepath_output: str):
+def plot_clustering_effect(filepath_input: str, filepath_output: str, number_of_bins: int = NUMBER_OF_BINS):
     df = pd.read_csv(filepath_input, header=0, delimiter=";")
+    plot_binned_clustering_effect(bin_clustering_effect(df["Degree"].to_numpy(), df["AvgClusteringCoef"].to_numpy(), number_of_bins),
+                                  filepath_output)
+
+def plot_clustering_effect_of_graph(degrees: np.ndarray, clustering_coefficients: np.ndarray, filepath_output: str,
+                                    number_of_bins: int = NUMBER_OF_BINS):
+    # Straight from degree and clustering coefficient of every vertex of loaded graph, no CSV needed
+    plot_binned_clustering_effect(bin_clustering_effect(degrees, clustering_coefficients, number_of_bins), filepath_output)
 
-    # Scatter Plot
+def plot_binned_degree_distribution(df: pd.DataFrame, filepath_output: str):
+    # Scatter Plot, one point per bin of degree
     plt.figure(figsize=(8, 6))
-    sns.scatterplot(data=df, x="Degree", y="Count",)
+    sns.scatterplot(data=df, x="Degree", y="Probability")
     plt.title("Degree distribution (Log-Log scale)")
     plt.xscale("log")
     plt.yscale("log")
@@ -29,6 +42,15 @@ def plot_degree_distribution(filepath_input: str, filepath_output: str):
     plt.savefig(filepath_output, format="pdf")
     plt.close()
 
+def plot_degree_distribution(filepath_input: str, filepath_output: str, number_of_bins: int = NUMBER_OF_BINS):
+    df = pd.read_csv(filepath_input, header=0, delimiter=";")
+    plot_binned_degree_distribution(bin_degree_distribution(df["Degree"].to_numpy(), df["Count"].to_numpy(), number_of_bins),
+                                    filepath_output)
+
+def plot_degree_distribution_of_graph(degrees: np.ndarray, filepath_output: str, number_of_bins: int = NUMBER_OF_BINS):
+    # Straight from degree of every vertex of loaded graph, no CSV needed
+    plot_binned_degree_distribution(bin_degree_distribution(degrees, None, number_of_bins), filepath_output)
+
 # Press the green button in the gutter to run the script.
 if __name__ == '__main__':
     plot_degree_distribution(r"C:\Users\ptaku\vsb_fei\MAS2\cv1\cv1\bin\Debug\net7.0\output\degreeDistribution.csv", r"C:\Users\ptaku\vsb_fei\MAS2\cv1\cv1\bin\Debug\net7.0\output\degreeDistribution1.pdf")
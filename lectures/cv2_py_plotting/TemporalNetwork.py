@@ -0,0 +1,136 @@
+class TemporalNetwork:
+    def __init__(self):
+        # Undirected weighted graph of one time window, changed edge by edge as events enter and leave the window.
+        # adjacency[u][v] = [number of events with edge (u, v), summed weight]
+        self.adjacency = {}
+        # Number of events in window touching node, node is in the window while it is positive
+        self.node_references = {}
+        self.weighted_degrees = {}
+        # Number of triangles containing node
+        self.triangles = {}
+        self.number_of_edges = 0
+        self.total_weight = 0.0
+        self.clustering_coefficient_sum = 0.0
+
+    def get_number_of_nodes(self):
+        return len(self.node_references)
+
+    def get_number_of_edges(self):
+        return self.number_of_edges
+
+    def get_degree(self, node: int):
+        return len(self.adjacency[node])
+
+    def get_clustering_coefficient(self, node: int):
+        degree = len(self.adjacency[node])
+        if degree < 2:
+            return 0.0  # Nodes with fewer than 2 neighbors have a clustering coefficient of 0.
+        return 2.0 * self.triangles[node] / (degree * (degree - 1))
+
+    def add_node(self, node: int):
+        if node in self.node_references:
+            self.node_references[node] += 1
+            return
+        self.node_references[node] = 1
+        self.adjacency[node] = {}
+        self.weighted_degrees[node] = 0.0
+        self.triangles[node] = 0
+
+    def remove_node(self, node: int):
+        self.node_references[node] -= 1
+        if self.node_references[node] > 0:
+            return
+        # All edges of node have left the window before
+        del self.node_references[node], self.adjacency[node], self.weighted_degrees[node], self.triangles[node]
+
+    def change_triangles(self, node_from: int, node_to: int, change: int):
+        # Edge (node_from, node_to) closes or opens one triangle with every common neighbour. Called while the edge is
+        # absent (added) or still present (removed). Coefficients of touched nodes are subtracted here and added back
+        # by the caller once the edge is changed.
+        neighbors_from, neighbors_to = self.adjacency[node_from], self.adjacency[node_to]
+        if len(neighbors_from) > len(neighbors_to):
+            neighbors_from, neighbors_to = neighbors_to, neighbors_from
+        common_neighbors = [node for node in neighbors_from if node in neighbors_to]
+        touched = common_neighbors + [node_from, node_to]
+
+        for node in touched:
+            self.clustering_coefficient_sum -= self.get_clustering_coefficient(node)
+        for node in common_neighbors:
+            self.triangles[node] += change
+        self.triangles[node_from] += change * len(common_neighbors)
+        self.triangles[node_to] += change * len(common_neighbors)
+        return touched
+
+    def add_edge(self, node_from: int, node_to: int, weight: float = 1.0):
+        # Self loops do not change degree or clustering coefficient
+        if node_from == node_to:
+            return
+        self.total_weight += weight
+        self.weighted_degrees[node_from] += weight
+        self.weighted_degrees[node_to] += weight
+        edge = self.adjacency[node_from].get(node_to)
+        if edge is not None:
+            edge[0] += 1
+            edge[1] += weight
+            return
+
+        touched = self.change_triangles(node_from, node_to, +1)
+        edge = [1, weight]
+        self.adjacency[node_from][node_to] = edge
+        self.adjacency[node_to][node_from] = edge
+        self.number_of_edges += 1
+        for node in touched:
+            self.clustering_coefficient_sum += self.get_clustering_coefficient(node)
+
+    def remove_edge(self, node_from: int, node_to: int, weight: float = 1.0):
+        if node_from == node_to:
+            return
+        self.total_weight -= weight
+        self.weighted_degrees[node_from] -= weight
+        self.weighted_degrees[node_to] -= weight
+        edge = self.adjacency[node_from][node_to]
+        edge[0] -= 1
+        edge[1] -= weight
+        if edge[0] > 0:
+            return
+
+        touched = self.change_triangles(node_from, node_to, -1)
+        del self.adjacency[node_from][node_to], self.adjacency[node_to][node_from]
+        self.number_of_edges -= 1
+        for node in touched:
+            self.clustering_coefficient_sum += self.get_clustering_coefficient(node)
+
+    def add_simplex(self, nodes: tuple, weight: float = 1.0):
+        # Every pair of nodes of simplex is connected
+        for node in nodes:
+            self.add_node(node)
+        for i in range(len(nodes)):
+            for j in range(i + 1, len(nodes)):
+                self.add_edge(nodes[i], nodes[j], weight)
+
+    def remove_simplex(self, nodes: tuple, weight: float = 1.0):
+        for i in range(len(nodes)):
+            for j in range(i + 1, len(nodes)):
+                self.remove_edge(nodes[i], nodes[j], weight)
+        for node in nodes:
+            self.remove_node(node)
+
+    def get_average_degree(self):
+        return 2 * self.number_of_edges / self.get_number_of_nodes()
+
+    def get_average_weighted_degree(self):
+        return 2 * self.total_weight / self.get_number_of_nodes()
+
+    def get_average_clustering_coefficient(self):
+        return self.clustering_coefficient_sum / self.get_number_of_nodes()
+
+    def get_density(self):
+        number_of_nodes = self.get_number_of_nodes()
+        if number_of_nodes < 2:
+            return 0.0
+        return 2 * self.number_of_edges / (number_of_nodes * (number_of_nodes - 1))
+
+    def get_node_with_max_degree(self):
+        # The first node with maximal degree
+        node = max(self.adjacency, key=lambda node: len(self.adjacency[node]))
+        return node, len(self.adjacency[node])
@@ -5,6 +5,8 @@ import os
 import matplotlib.pyplot as plt
 from matplotlib.gridspec import GridSpec
 
+from temporal_metrics import group_by_year, read_dblp_simplices, write_dblp_metrics
+
 
 def plot_data(input_filepath: str, output_filepath: str):
 
@@ -107,5 +109,12 @@ if __name__ == '__main__':
     output_filepaths = [r"C:\Users\ptaku\vsb_fei\MAS2\cv2\cv2\cv2\bin\Release\net7.0\outputs\outputsPerOneYears.pdf",
                         r"C:\Users\ptaku\vsb_fei\MAS2\cv2\cv2\cv2\bin\Release\net7.0\outputs\outputsPerTenYears.pdf"]
 
+    # CSVs are regenerated from coauth-DBLP stream in one pass when the data are available
+    dblp_directory = r"coauth-DBLP"
+    if os.path.isdir(dblp_directory):
+        events_by_year = group_by_year(read_dblp_simplices(dblp_directory))
+        for input_filepath, window_length in zip(input_filepaths, [1, 10]):
+            write_dblp_metrics(events_by_year, input_filepath, window_length)
+
     for i in range(0, len(input_filepaths)):
         plot_data(input_filepaths[i], output_filepaths[i])
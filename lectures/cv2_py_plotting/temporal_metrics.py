@@ -0,0 +1,148 @@
+import argparse
+import os
+
+from TemporalNetwork import TemporalNetwork
+
+DBLP_COLUMNS = ["Year", "CountOfNodes", "CountOfEdges", "AverageDegree", "AverageWeightedDegree", "AverageClusteringCoefficient",
+                "IdOfSimplexWithMaxAvgWDegree", "WDegreeOfSimplexWithMaxAvgWDegree"]
+
+# Files of Yahoo report and their columns, the same as written by MultiLayerGraph.Log* methods
+YAHOO_FILES = {
+    "averageOutDegrees.csv": ["Year", "AverageDegree", "AverageWeightedDegree"],
+    "nodesAndEdges.csv": ["Year", "Nodes", "Edges"],
+    "averageClusteringCoefficient.csv": ["Year", "AverageClusteringCoefficient"],
+    "density.csv": ["Year", "Density"],
+    "maxOutDegrees.csv": ["Year", "NodeWithMostDegree", "Degree"],
+}
+
+
+def read_dblp_simplices(data_directory: str):
+    # Yields (year, id of simplex, nodes of simplex, weight) from coauth-DBLP-{times,nverts,simplices}.txt, ids start at 1
+    with open(os.path.join(data_directory, "coauth-DBLP-times.txt"), "r") as time_file, \
+            open(os.path.join(data_directory, "coauth-DBLP-nverts.txt"), "r") as number_of_nodes_file, \
+            open(os.path.join(data_directory, "coauth-DBLP-simplices.txt"), "r") as nodes_file:
+        for simplex_id, (line_time, line_number_of_nodes) in enumerate(zip(time_file, number_of_nodes_file), start=1):
+            nodes = tuple(int(nodes_file.readline()) for _ in range(int(line_number_of_nodes)))
+            yield int(line_time), simplex_id, nodes, 1.0
+
+
+def read_yahoo_messages(filepath: str, step: int = 100_000):
+    # Yields (time period, None, (node from, node to), weight) of "from to weight timestamp" lines,
+    # time period i holds timestamps [step * (i - 1), step * i)
+    with open(filepath, "r") as file:
+        for line in file:
+            parsed_line = line.split()
+            if not parsed_line or line[0] in "%#":
+                continue
+            yield int(parsed_line[3]) // step + 1, None, (int(parsed_line[0]), int(parsed_line[1])), float(parsed_line[2])
+
+
+def group_by_year(events):
+    # One pass over the stream, events do not need to be sorted by time
+    events_by_year = {}
+    for year, simplex_id, nodes, weight in events:
+        events_by_year.setdefault(year, []).append((simplex_id, nodes, weight))
+    return events_by_year
+
+
+def get_simplex_with_max_avg_weighted_degree(network: TemporalNetwork, simplices: list):
+    # The first simplex with maximal average weighted degree of its nodes
+    best_id, best_value = -1, 0.0
+    for simplex_id, nodes in simplices:
+        value = sum(network.weighted_degrees[node] for node in nodes) / len(nodes)
+        if best_id == -1 or value > best_value:
+            best_id, best_value = simplex_id, value
+    return best_id, best_value
+
+
+def sweep_windows(events_by_year: dict, window_length: int = None, step: int = None):
+    # Yields (first year of window, network of window, simplices of window) for windows [year, year + window_length)
+    # starting every step years. Each event is added once when it enters and removed once when it leaves the window,
+    # so all windows together cost one pass over the stream. window_length None makes windows cumulative.
+    step = step or window_length or 1
+    years = sorted(events_by_year)
+    if not years:
+        return
+    network = TemporalNetwork()
+    simplices = {}
+    first_in_window, end_of_window = years[0], years[0]
+
+    for start in range(years[0], years[-1] + 1, step):
+        end = start + window_length if window_length is not None else start + step
+        # Years leaving the window
+        if window_length is not None:
+            for year in range(first_in_window, min(start, end_of_window)):
+                for simplex_id, nodes, weight in events_by_year.get(year, []):
+                    network.remove_simplex(nodes, weight)
+                    simplices.pop(simplex_id, None)
+            first_in_window = start
+        # Years entering the window
+        for year in range(max(end_of_window, first_in_window), end):
+            for simplex_id, nodes, weight in events_by_year.get(year, []):
+                network.add_simplex(nodes, weight)
+                if simplex_id is not None:
+                    simplices[simplex_id] = nodes
+        end_of_window = max(end_of_window, end)
+
+        if network.get_number_of_nodes() > 0:
+            yield start, network, simplices
+
+
+def format_value(value):
+    # Numbers written the same way as by the C# programs, 976 instead of 976.0
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def write_rows(filepath: str, columns: list, rows: list):
+    with open(filepath, "w") as file:
+        file.write(";".join(columns) + "\n")
+        for row in rows:
+            file.write(";".join(format_value(value) for value in row) + "\n")
+
+
+def write_dblp_metrics(events_by_year: dict, output_filepath: str, window_length: int = 1, step: int = None):
+    # outputsPer{One,Ten}Years.csv of cv2
+    rows = []
+    for year, network, simplices in sweep_windows(events_by_year, window_length, step):
+        simplex_id, weighted_degree = get_simplex_with_max_avg_weighted_degree(network, simplices.items())
+        rows.append((year, network.get_number_of_nodes(), network.get_number_of_edges(), network.get_average_degree(),
+                     network.get_average_weighted_degree(), network.get_average_clustering_coefficient(), simplex_id, weighted_degree))
+    write_rows(output_filepath, DBLP_COLUMNS, rows)
+
+
+def write_yahoo_metrics(events_by_year: dict, output_directory: str):
+    # Yahoo time periods are cumulative, period i contains all messages up to its end
+    rows = {filename: [] for filename in YAHOO_FILES}
+    for year, network, _ in sweep_windows(events_by_year, window_length=None, step=1):
+        node, degree = network.get_node_with_max_degree()
+        rows["averageOutDegrees.csv"].append((year, network.get_average_degree(), network.get_average_weighted_degree()))
+        rows["nodesAndEdges.csv"].append((year, network.get_number_of_nodes(), network.get_number_of_edges()))
+        rows["averageClusteringCoefficient.csv"].append((year, network.get_average_clustering_coefficient()))
+        rows["density.csv"].append((year, network.get_density()))
+        rows["maxOutDegrees.csv"].append((year, node, degree))
+    os.makedirs(output_directory, exist_ok=True)
+    for filename, columns in YAHOO_FILES.items():
+        write_rows(os.path.join(output_directory, filename), columns, rows[filename])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Metrics of time windows of temporal network, computed in one pass over the stream.")
+    subparsers = parser.add_subparsers(dest="dataset", required=True)
+    dblp = subparsers.add_parser("dblp", help="outputsPerOneYears.csv and outputsPerTenYears.csv of coauth-DBLP")
+    dblp.add_argument("data_directory")
+    dblp.add_argument("output_directory")
+    yahoo = subparsers.add_parser("yahoo", help="CSV files of Yahoo report from ia-yahoo-messages.mtx")
+    yahoo.add_argument("filepath")
+    yahoo.add_argument("output_directory")
+    yahoo.add_argument("--step", type=int, default=100_000, help="length of one time period in timestamps")
+    arguments = parser.parse_args()
+
+    if arguments.dataset == "dblp":
+        events_by_year = group_by_year(read_dblp_simplices(arguments.data_directory))
+        os.makedirs(arguments.output_directory, exist_ok=True)
+        write_dblp_metrics(events_by_year, os.path.join(arguments.output_directory, "outputsPerOneYears.csv"), window_length=1)
+        write_dblp_metrics(events_by_year, os.path.join(arguments.output_directory, "outputsPerTenYears.csv"), window_length=10)
+    else:
+        write_yahoo_metrics(group_by_year(read_yahoo_messages(arguments.filepath, arguments.step)), arguments.output_directory)
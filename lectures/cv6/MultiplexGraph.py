@@ -0,0 +1,42 @@
+import igraph as ig
+import numpy as np
+
+
+class MultiplexGraph:
+    def __init__(self, g: ig.Graph):
+        # g is the flattened graph of load_from_file, edge i lies in layer g.es[i]["layer_id"]
+        self.g = g
+        self.layers = list(g["layers"])
+        self.edges = np.array(g.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+
+        # Edge ids of layer i are layer_edge_ids[layer_offsets[i]:layer_offsets[i + 1]]
+        layer_of_edges = np.array(g.es["layer_id"], dtype=np.int64)
+        self.layer_edge_ids = np.argsort(layer_of_edges, kind="stable")
+        self.layer_offsets = np.concatenate(([0], np.cumsum(np.bincount(layer_of_edges, minlength=len(self.layers)))))
+
+        # Per layer views and active actors, built on first use
+        self.layer_graphs = {}
+        self.active_actors = {}
+
+    def get_layer_id(self, layer: str):
+        return self.layers.index(layer)
+
+    def get_layer_edges(self, layer: str):
+        layer_id = self.get_layer_id(layer)
+        return self.layer_edge_ids[self.layer_offsets[layer_id]:self.layer_offsets[layer_id + 1]]
+
+    def get_active_actors(self, layer: str):
+        # Ids of actors with at least one edge in layer, sorted
+        if layer not in self.active_actors:
+            self.active_actors[layer] = np.unique(self.edges[self.get_layer_edges(layer)])
+        return self.active_actors[layer]
+
+    def get_layer(self, layer: str):
+        # Graph of one layer with its active actors only, built once and shared by metrics, plots and communities.
+        # Vertices keep order of the flattened graph, vertex i of the view is actor get_active_actors(layer)[i].
+        if layer not in self.layer_graphs:
+            self.layer_graphs[layer] = self.g.subgraph_edges(self.get_layer_edges(layer).tolist(), delete_vertices=True)
+        return self.layer_graphs[layer]
+
+    def get_flattened(self):
+        return self.g
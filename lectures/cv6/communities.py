@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import igraph as ig
+import numpy as np
+
+from MultiplexGraph import MultiplexGraph
+
+
+def run_louvain(number_of_vertices: int, edges: np.ndarray, weights: np.ndarray, seed: int):
+    # igraph draws its random numbers from the random module, so seeding it makes Louvain reproducible
+    random.seed(seed)
+    g = ig.Graph(n=number_of_vertices, edges=list(zip(edges[:, 0].tolist(), edges[:, 1].tolist())))
+    communities = g.community_multilevel(weights=None if weights is None else weights.tolist())
+    return np.array(communities.membership, dtype=np.int64)
+
+
+def get_view_edges(g: ig.Graph):
+    return np.array(g.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+
+
+def build_supra_graph(mg: MultiplexGraph, interlayer_coupling: float):
+    # Vertex of supra graph is (actor, layer) for every active actor of layer. Edges of layers keep weight 1
+    # and copies of the same actor in different layers are joined by edges of weight interlayer_coupling.
+    edges = []
+    weights = []
+    copies = []
+    offset = 0
+    for layer in mg.layers:
+        g_for_layer = mg.get_layer(layer)
+        edges.append(get_view_edges(g_for_layer) + offset)
+        weights.append(np.ones(g_for_layer.ecount()))
+        copies.append((mg.get_active_actors(layer), np.arange(offset, offset + g_for_layer.vcount())))
+        offset += g_for_layer.vcount()
+
+    actors = np.concatenate([actors for actors, _ in copies])
+    supra_vertices = np.concatenate([vertices for _, vertices in copies])
+    order = np.argsort(actors, kind="stable")
+    actors, supra_vertices = actors[order], supra_vertices[order]
+    # Copies of one actor are consecutive, join every pair of them
+    for shift in range(1, len(mg.layers)):
+        same_actor = actors[shift:] == actors[:-shift]
+        edges.append(np.column_stack((supra_vertices[:-shift][same_actor], supra_vertices[shift:][same_actor])))
+        weights.append(np.full(int(same_actor.sum()), interlayer_coupling))
+    return offset, np.concatenate(edges), np.concatenate(weights)
+
+
+def graph_fingerprint(mg: MultiplexGraph, **options):
+    # Same edges in the same layers with the same options give the same communities
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(mg.edges).tobytes())
+    digest.update(np.ascontiguousarray(mg.layer_edge_ids).tobytes())
+    digest.update(json.dumps({"layers": mg.layers, **options}, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def detect_communities(mg: MultiplexGraph, seed: int = 0, multiplex: bool = False, interlayer_coupling: float = 1.0,
+                       max_workers: int = None, cache_directory: str = "Outputs"):
+    # Louvain membership of vertices of every layer view and of flattened graph, keyed by layer name and "flattened".
+    # With multiplex, layers are split by one joint run on supra graph instead of one run per layer.
+    fingerprint = graph_fingerprint(mg, seed=seed, multiplex=multiplex, interlayer_coupling=interlayer_coupling)
+    cache_filepath = os.path.join(cache_directory, f"communities_{fingerprint}.npz")
+    if os.path.exists(cache_filepath):
+        with np.load(cache_filepath) as cached:
+            return {name: cached[name] for name in cached.files}
+
+    # Every job gets its own seed derived from seed, so results do not depend on order of jobs
+    jobs = {"flattened": (mg.g.vcount(), mg.edges, None)}
+    if multiplex:
+        jobs["supra"] = build_supra_graph(mg, interlayer_coupling)
+    else:
+        for layer in mg.layers:
+            g_for_layer = mg.get_layer(layer)
+            jobs[layer] = (g_for_layer.vcount(), get_view_edges(g_for_layer), None)
+    seeds = np.random.SeedSequence(seed).generate_state(len(jobs))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {name: executor.submit(run_louvain, *job, int(job_seed)) for (name, job), job_seed in zip(jobs.items(), seeds)}
+        communities = {name: future.result() for name, future in futures.items()}
+
+    if multiplex:
+        # Supra vertices are ordered by layer, the same as vertices of layer views
+        supra = communities.pop("supra")
+        offset = 0
+        for layer in mg.layers:
+            number_of_vertices = mg.get_layer(layer).vcount()
+            communities[layer] = supra[offset:offset + number_of_vertices]
+            offset += number_of_vertices
+
+    os.makedirs(cache_directory, exist_ok=True)
+    np.savez(cache_filepath, **communities)
+    return communities
@@ -1,49 +1,98 @@
+import gzip
 import igraph as ig
 import random
+import numpy as np
 
 import matplotlib.pyplot as plt
 
-def load_from_file(filePath: str):
+from MultiplexGraph import MultiplexGraph
+from raster import RASTER_THRESHOLD, raster_filename, render_density, should_rasterize
+
+def open_text(filePath: str):
+    if filePath.endswith(".gz"):
+        return gzip.open(filePath, "rt")
+    return open(filePath, "r")
+
+
+def parse_mpx(filePath: str):
+    # One pass over #LAYERS, #ACTOR ATTRIBUTES, #ACTORS and #EDGES sections.
+    # Actors and layers are interned to dense ids in order of first appearance.
     actual_header = None
+    actor_ids = {}
+    layer_ids = {}
     actor_attributes = []
-
-    g = ig.Graph(directed=False)
+    attribute_values = []
+    sources = []
+    targets = []
+    edge_layers = []
 
     # Open file
-    with open(filePath, "r") as file:
+    with open_text(filePath) as file:
 
         for line in file:
-            processed_line = line.rstrip("\n")
+            processed_line = line.rstrip("\r\n")
             if len(processed_line) <= 0:
                 continue
 
             # headers
             if processed_line.startswith("#"):
-                processed_line = processed_line.lstrip("#")
-                actual_header = processed_line
+                actual_header = processed_line.lstrip("#")
+                if actual_header == "ACTORS":
+                    attribute_values = [[] for _ in actor_attributes]
             # data
-            else:
-                if actual_header == "LAYERS":
+            elif actual_header == "EDGES":
+                splitted_line = processed_line.split(",", 3)
+                sources.append(actor_ids.setdefault(splitted_line[0], len(actor_ids)))
+                targets.append(actor_ids.setdefault(splitted_line[1], len(actor_ids)))
+                edge_layers.append(layer_ids.setdefault(splitted_line[2], len(layer_ids)))
+            elif actual_header == "ACTORS":
+                splitted_line = processed_line.split(",")
+                if splitted_line[0] in actor_ids:
                     continue
-                elif actual_header == "ACTOR ATTRIBUTES":
-                    actor_attributes.append(processed_line.split(",")[0])
-                elif actual_header == "ACTORS":
-                    v = g.add_vertex(name=processed_line.split(",")[0])
-                    for i, attribute in enumerate(actor_attributes):
-                        v[attribute] = processed_line.split(",")[1:][i]
-                elif actual_header == "NODES":
-                    continue
-                elif actual_header == "EDGES":
-                    splitted_line = processed_line.split(",")
-                    actorFrom = splitted_line[0]
-                    actorTo = splitted_line[1]
-                    layer = splitted_line[2]
-                    e = g.add_edge(actorFrom, actorTo)
-                    e["layer"] = layer
+                actor_ids[splitted_line[0]] = len(actor_ids)
+                for i, values in enumerate(attribute_values):
+                    values.append(splitted_line[i + 1] if i + 1 < len(splitted_line) else None)
+            elif actual_header == "LAYERS":
+                splitted_line = processed_line.split(",")
+                layer_ids.setdefault(splitted_line[0], len(layer_ids))
+            elif actual_header == "ACTOR ATTRIBUTES":
+                actor_attributes.append(processed_line.split(",")[0])
+
+    # Actors seen only in #EDGES have no attributes
+    for values in attribute_values:
+        values.extend([None] * (len(actor_ids) - len(values)))
+
+    return {
+        "actors": list(actor_ids),
+        "actor_attributes": dict(zip(actor_attributes, attribute_values)),
+        "layers": list(layer_ids),
+        "edges": np.column_stack((np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64))),
+        "edge_layers": np.array(edge_layers, dtype=np.int64),
+    }
+
 
+def load_from_file(filePath: str):
+    mpx = parse_mpx(filePath)
+    layers = np.array(mpx["layers"], dtype=object)
+
+    # Whole graph is built in one call, layer of edge i is g["layers"][g.es[i]["layer_id"]]
+    edges = zip(mpx["edges"][:, 0].tolist(), mpx["edges"][:, 1].tolist())
+    g = ig.Graph(n=len(mpx["actors"]), edges=list(edges), directed=False,
+                 vertex_attrs={"name": mpx["actors"], **mpx["actor_attributes"]},
+                 edge_attrs={"layer_id": mpx["edge_layers"].tolist(), "layer": layers[mpx["edge_layers"]].tolist()})
+    g["layers"] = mpx["layers"]
     return g
 
 
+def plot_graph(g: ig.Graph, layout: ig.Layout, output_filename: str, raster_threshold: int = RASTER_THRESHOLD, **style):
+    # ig.plot for small graphs, PNG density image next to output_filename for graphs above raster_threshold
+    if should_rasterize(g.vcount(), g.ecount(), raster_threshold):
+        render_density(layout.coords, g.get_edgelist(), raster_filename(output_filename), style.get("vertex_color"),
+                       style.get("edge_color", "gray"))
+    else:
+        ig.plot(g, target=output_filename, layout=layout, **style)
+
+
 def plot_flattened(g: ig.Graph):
     # Create a layout for plotting
     layout = g.layout("auto")
@@ -53,18 +102,15 @@ def plot_flattened(g: ig.Graph):
 
     # Plot the multilayer network using matplotlib
     output_filename = rf"Outputs/flattened.pdf"
-    ig.plot(g, target=output_filename, layout=layout, vertex_label=[v["name"] for v in g.vs],
+    plot_graph(g, layout, output_filename, vertex_label=[v["name"] for v in g.vs],
             edge_color="green", vertex_size=vertex_sizes)
 
 
-def plot_layers(g: ig.Graph):
-    layers = list(set(g.es.get_attribute_values("layer")))
+def plot_layers(mg: MultiplexGraph):
     # For each layer
-    for i, layer in enumerate(layers):
-        # Create graph only for certain layer
-        g_for_layer = g.copy()
-        g_for_layer.delete_edges(g_for_layer.es.select(layer_ne=layer))
-        g_for_layer.delete_vertices([v for v in g.vs if len(list(g.es.select(lambda x: (x.source==v.index or x.source==v.index) and x["layer"]==layer))) <= 0])
+    for i, layer in enumerate(mg.layers):
+        # Graph only for certain layer
+        g_for_layer = mg.get_layer(layer)
 
         #ax = axes[i]
         # Create a layout for plotting
@@ -75,22 +121,19 @@ def plot_layers(g: ig.Graph):
 
         # Plot the multilayer network using matplotlib
         output_filename = rf"Outputs/{layer}.pdf"
-        ig.plot(g_for_layer, target=output_filename, layout=layout, vertex_label=[v["name"] for v in g_for_layer.vs],
+        plot_graph(g_for_layer, layout, output_filename, vertex_label=[v["name"] for v in g_for_layer.vs],
                 edge_color="green", vertex_size=vertex_sizes)
 
 
-def plot_communities_layers(g: ig.Graph):
-    layers = list(set(g.es.get_attribute_values("layer")))
+def plot_communities_layers(mg: MultiplexGraph, memberships: dict):
+    # memberships are results of detect_communities, plotting never runs community detection
     # For each layer
-    for i, layer in enumerate(layers):
-        # Create graph only for certain layer
-        g_for_layer = g.copy()
-        g_for_layer.delete_edges(g_for_layer.es.select(layer_ne=layer))
-        g_for_layer.delete_vertices([v for v in g.vs if len(list(
-            g.es.select(lambda x: (x.source == v.index or x.source == v.index) and x["layer"] == layer))) <= 0])
+    for i, layer in enumerate(mg.layers):
+        # Graph only for certain layer
+        g_for_layer = mg.get_layer(layer)
 
-        # Perform community detection using the Louvain method
-        communities = g_for_layer.community_multilevel()
+        # Communities found by the Louvain method
+        communities = ig.VertexClustering(g_for_layer, memberships[layer].tolist())
 
         # Assign a unique color to each community
         color_dict = {}
@@ -114,12 +157,12 @@ def plot_communities_layers(g: ig.Graph):
 
         # Plot the multilayer network using matplotlib
         output_filename = rf"Outputs/{layer}_louvain.pdf"
-        ig.plot(g_for_layer, target=output_filename, layout=layout, vertex_label=[v["name"] for v in g_for_layer.vs],
+        plot_graph(g_for_layer, layout, output_filename, vertex_label=[v["name"] for v in g_for_layer.vs],
                 edge_color="green", vertex_color=colors, vertex_size=vertex_sizes)
 
-def plot_communities_flattened(g: ig.Graph):
-    # Perform community detection using the Louvain method
-    communities = g.community_multilevel()
+def plot_communities_flattened(g: ig.Graph, membership: np.ndarray):
+    # Communities found by the Louvain method
+    communities = ig.VertexClustering(g, membership.tolist())
 
     # Assign a unique color to each community
     color_dict = {}
@@ -140,5 +183,5 @@ def plot_communities_flattened(g: ig.Graph):
 
     # Plot the multilayer network using matplotlib
     output_filename = rf"Outputs/flattened_louvain.pdf"
-    ig.plot(g, target=output_filename, layout=layout, vertex_label=[v["name"] for v in g.vs],
+    plot_graph(g, layout, output_filename, vertex_label=[v["name"] for v in g.vs],
             edge_color="green", vertex_color=colors, vertex_size=vertex_sizes)
\ No newline at end of file
@@ -1,17 +1,20 @@
-import igraph as ig
-import matplotlib.pyplot as plt
-
 # My functions
-from functions import *
+from functions import load_from_file, plot_communities_flattened, plot_communities_layers, plot_flattened, plot_layers
+from MultiplexGraph import MultiplexGraph
+from communities import detect_communities
 
 
 if __name__ == '__main__':
     filePath = r"aucs.mpx"
 
     g = load_from_file(filePath)
+    # Layer views are built once and shared by all per layer plots
+    mg = MultiplexGraph(g)
 
-    plot_layers(g)
+    plot_layers(mg)
     plot_flattened(g)
 
-    plot_communities_layers(g)
-    plot_communities_flattened(g)
+    # Louvain of all layers and of flattened graph run in parallel, results are cached in Outputs
+    memberships = detect_communities(mg, seed=0)
+    plot_communities_layers(mg, memberships)
+    plot_communities_flattened(g, memberships["flattened"])
@@ -0,0 +1,223 @@
+import igraph as ig
+import numpy as np
+
+# States of vertices stored in uint8 state vector
+HEALTHY = 0
+ACTIVE = 1
+INFECTED = 2
+
+# Batched runs are packed into bits of one little-endian uint64 per vertex
+NUMBER_OF_LANES = 64
+LANES_DTYPE = np.dtype("<u8")
+# Above this probability random bits are built from whole random words instead of sampling set bits one by one
+DENSE_BITS_PROBABILITY = 0.1
+RANDOM_WORDS_PRECISION = 24
+
+
+def count_lanes(masks: np.ndarray, number_of_lanes: int = NUMBER_OF_LANES):
+    # Number of masks with bit i set, for each of the first number_of_lanes bits
+    lanes = np.unpackbits(masks.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    return lanes[:, :number_of_lanes].sum(axis=0)
+
+
+def count_bits(masks: np.ndarray):
+    # Number of set bits of each mask
+    return np.unpackbits(masks.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+def random_ranks(total: int, p: float, rng: np.random.Generator):
+    # Sorted subset of range(total), every number kept independently with probability 0 < p < 1.
+    # Gaps between kept numbers are geometric, so only the kept ones are drawn.
+    chunks = []
+    rank = -1
+    while rank < total:
+        expected = total * p
+        ranks = rank + np.cumsum(rng.geometric(p, size=int(expected + 4 * np.sqrt(expected)) + 16))
+        rank = ranks[-1]
+        chunks.append(ranks)
+    ranks = np.concatenate(chunks)
+    return ranks[ranks < total]
+
+
+def record_finished_lanes(active: np.ndarray, epoch: int, timesteps_used: np.ndarray):
+    # Lanes without active vertices end in this epoch, the same epoch scalar simulation reports
+    running = np.bitwise_or.reduce(active) if active.size > 0 else 0
+    lanes = np.arange(timesteps_used.size, dtype=LANES_DTYPE)
+    finished = ((LANES_DTYPE.type(running) >> lanes) & LANES_DTYPE.type(1)) == 0
+    timesteps_used[finished & (timesteps_used == 0)] = epoch
+
+
+class CSRGraph:
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray = None):
+        # Neighbours of vertex v are indices[indptr[v]:indptr[v + 1]]
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+
+        self.state = np.zeros(self.get_number_of_vertices(), dtype=np.uint8)
+        self.number_of_infected = np.zeros(self.get_number_of_vertices(), dtype=np.int64)
+        # Edges leaving frontier and Bernoulli draws of the last step, for observers of simulation
+        self.edges_examined = 0
+        self.random_draws = 0
+
+    @classmethod
+    def from_edges(cls, number_of_vertices: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray = None):
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+
+        # Store each edge in both directions, the same way igraph neighbors() ignores direction
+        all_sources = np.concatenate((sources, targets))
+        all_targets = np.concatenate((targets, sources))
+        order = np.argsort(all_sources, kind="stable")
+
+        indptr = np.zeros(number_of_vertices + 1, dtype=np.int64)
+        np.cumsum(np.bincount(all_sources, minlength=number_of_vertices), out=indptr[1:])
+        indices = all_targets[order].astype(np.int32)
+
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64)
+            weights = np.concatenate((weights, weights))[order]
+
+        return cls(indptr, indices, weights)
+
+    @classmethod
+    def from_igraph(cls, g: ig.Graph):
+        edges = np.array(g.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+        weights = None
+        if "weight" in g.es.attributes():
+            weights = np.array(g.es["weight"], dtype=np.float64)
+        return cls.from_edges(g.vcount(), edges[:, 0], edges[:, 1], weights)
+
+    def get_number_of_vertices(self):
+        return self.indptr.size - 1
+
+    def get_number_of_edges(self):
+        return self.indices.size // 2
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def reset_states(self):
+        self.state[:] = HEALTHY
+        self.number_of_infected[:] = 0
+
+    def neighborhood_positions(self, frontier: np.ndarray):
+        # Degrees of frontier and positions in indices of all edges leaving frontier, in frontier order
+        starts = self.indptr[frontier]
+        degrees = self.indptr[frontier + 1] - starts
+        total = int(degrees.sum())
+        positions = np.arange(total, dtype=np.int64) + np.repeat(starts - (np.cumsum(degrees) - degrees), degrees)
+        return degrees, positions
+
+    def neighborhood_edges(self, frontier: np.ndarray):
+        # Concatenated (source, target) pairs of all edges leaving frontier, in frontier order
+        degrees, positions = self.neighborhood_positions(frontier)
+        return np.repeat(frontier, degrees), self.indices[positions].astype(np.int64)
+
+    def step(self, frontier: np.ndarray, p: float, rng: np.random.Generator):
+        sources, targets = self.neighborhood_edges(frontier)
+
+        # Try to infect only healthy neighbours, one Bernoulli draw per edge
+        healthy = self.state[targets] == HEALTHY
+        self.edges_examined = healthy.size
+        sources, targets = sources[healthy], targets[healthy]
+        self.random_draws = targets.size
+        hits = rng.random(targets.size) < p
+        sources, targets = sources[hits], targets[hits]
+
+        # Vertex is activated only once, the first successful source in frontier order gets the credit
+        targets, first = np.unique(targets, return_index=True)
+        sources = sources[first]
+        self.number_of_infected += np.bincount(sources, minlength=self.get_number_of_vertices())
+        self.state[targets] = ACTIVE
+
+        # change active to infected
+        self.state[frontier] = INFECTED
+        return targets
+
+    def get_ratio_of_infected(self):
+        return np.count_nonzero(self.state == INFECTED) / self.get_number_of_vertices()
+
+    def random_words(self, number_of_words: int, p: float, rng: np.random.Generator):
+        # Words with every bit set with probability p (to RANDOM_WORDS_PRECISION binary digits),
+        # built by and/or of uniform random words following binary expansion of p
+        digits = int(p * (1 << RANDOM_WORDS_PRECISION))
+        words = np.zeros(number_of_words, dtype=LANES_DTYPE)
+        for _ in range(RANDOM_WORDS_PRECISION):
+            uniform = rng.integers(0, np.iinfo(LANES_DTYPE).max, size=number_of_words, dtype=LANES_DTYPE, endpoint=True)
+            if digits & 1:
+                words |= uniform
+            else:
+                words &= uniform
+            digits >>= 1
+        return words
+
+    def random_bits(self, candidates: np.ndarray, p: float, rng: np.random.Generator):
+        # Keep every set bit of candidates independently with probability p. Only the kept bits are drawn,
+        # their ranks among all set bits are sampled by geometric gaps.
+        if p >= 1.0:
+            return candidates.copy()
+        if p >= DENSE_BITS_PROBABILITY:
+            return candidates & self.random_words(candidates.size, p, rng)
+        hits = np.zeros_like(candidates)
+        counts = np.bitwise_count(candidates).astype(np.int64)
+        total_bits = int(counts.sum())
+        if p <= 0.0 or total_bits == 0:
+            return hits
+
+        ranks = random_ranks(total_bits, p, rng)
+
+        # Find mask of each drawn rank and the rank of the bit inside the mask
+        ends = np.cumsum(counts)
+        mask_ids = np.searchsorted(ends, ranks, side="right")
+        bit_ranks = ranks - (ends[mask_ids] - counts[mask_ids])
+
+        # Select bit_ranks-th set bit of each mask
+        set_bits = np.unpackbits(candidates[mask_ids].view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+        lanes = np.argmax(np.cumsum(set_bits, axis=1) > bit_ranks[:, None], axis=1)
+        bits = np.left_shift(LANES_DTYPE.type(1), lanes.astype(LANES_DTYPE))
+
+        # Ranks are sorted, so bits of one mask form a contiguous run
+        if mask_ids.size > 0:
+            run_starts = np.flatnonzero(np.concatenate(([True], mask_ids[1:] != mask_ids[:-1])))
+            hits[mask_ids[run_starts]] = np.bitwise_or.reduceat(bits, run_starts)
+        return hits
+
+    def simulate_batch(self, seed_sets: list, p: float, timesteps: int, rng: np.random.Generator):
+        # Up to 64 independent runs advance in lockstep, run i lives in bit i of per vertex masks.
+        # Returns ratio of infected vertices and last timestep of each run.
+        if len(seed_sets) > NUMBER_OF_LANES:
+            raise ValueError(f"At most {NUMBER_OF_LANES} runs fit in one batch, got {len(seed_sets)}")
+        active = np.zeros(self.get_number_of_vertices(), dtype=LANES_DTYPE)
+        infected = np.zeros(self.get_number_of_vertices(), dtype=LANES_DTYPE)
+        for lane, seeds in enumerate(seed_sets):
+            active[np.asarray(seeds, dtype=np.int64)] |= LANES_DTYPE.type(1 << lane)
+        timesteps_used = np.zeros(len(seed_sets), dtype=np.int64)
+
+        # for each timestep
+        for epoch in range(1, timesteps):
+            record_finished_lanes(active, epoch, timesteps_used)
+            frontier = np.flatnonzero(active)
+            # If there arent any active vertices in any run. Then end simulation.
+            if frontier.size == 0:
+                break
+            degrees, positions = self.neighborhood_positions(frontier)
+            targets = self.indices[positions]
+
+            # Runs in which source is active and target is still healthy
+            healthy = ~(active | infected)
+            candidates = np.repeat(active[frontier], degrees) & healthy[targets]
+            attempted = candidates != 0
+            candidates, targets = candidates[attempted], targets[attempted]
+            hits = self.random_bits(candidates, p, rng)
+            successful = hits != 0
+
+            newly_active = np.zeros_like(active)
+            np.bitwise_or.at(newly_active, targets[successful], hits[successful])
+
+            # change active to infected
+            infected |= active
+            active = newly_active
+
+        timesteps_used[timesteps_used == 0] = max(timesteps - 1, 0)
+        return count_lanes(infected, len(seed_sets)) / self.get_number_of_vertices(), timesteps_used
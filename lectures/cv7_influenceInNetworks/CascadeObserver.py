@@ -0,0 +1,62 @@
+import numpy as np
+
+# Columns of rows kept by CascadeRecorder, one row per epoch of observed cascade
+EPOCH_COLUMNS = ["cascade", "epoch", "frontier_size", "edges_examined", "activations", "random_draws", "nanoseconds"]
+
+
+class CascadeObserver:
+    # Gets statistics of every epoch of Graph.IC_simulation. Methods do nothing, subclasses override those they need.
+    def on_start(self, engine: str, candidates: np.ndarray):
+        pass
+
+    def on_epoch(self, epoch: int, frontier_size: int, edges_examined: int, activations: int, random_draws: int, nanoseconds: int):
+        # frontier_size vertices were active at start of epoch, edges_examined edges left them, random_draws of those
+        # led to healthy vertices and were tried, activations vertices became active
+        pass
+
+    def on_end(self, ratio: float, epoch: int):
+        pass
+
+
+class CascadeRecorder(CascadeObserver):
+    def __init__(self):
+        # Rows of all observed cascades in EPOCH_COLUMNS order, cascades are numbered from 0
+        self.rows = []
+        self.number_of_cascades = 0
+        self.results = []
+
+    def on_start(self, engine: str, candidates: np.ndarray):
+        self.number_of_cascades += 1
+
+    def on_epoch(self, epoch: int, frontier_size: int, edges_examined: int, activations: int, random_draws: int, nanoseconds: int):
+        self.rows.append((self.number_of_cascades - 1, epoch, frontier_size, edges_examined, activations, random_draws, nanoseconds))
+
+    def on_end(self, ratio: float, epoch: int):
+        self.results.append((ratio, epoch))
+
+    def get_array(self):
+        return np.array(self.rows, dtype=np.int64).reshape(-1, len(EPOCH_COLUMNS))
+
+    def get_tail(self, max_frontier_size: int = 10):
+        # Share of epochs and of time spent with at most max_frontier_size active vertices, the long tails of cascades
+        # which mostly decide how large timesteps has to be
+        rows = self.get_array()
+        if rows.shape[0] == 0:
+            return 0.0, 0.0
+        tail = rows[:, 2] <= max_frontier_size
+        nanoseconds = rows[:, 6]
+        return float(tail.mean()), float(nanoseconds[tail].sum() / max(nanoseconds.sum(), 1))
+
+    def get_summary(self, max_frontier_size: int = 10):
+        rows = self.get_array()
+        tail_epochs, tail_time = self.get_tail(max_frontier_size)
+        return {"cascades": self.number_of_cascades, "epochs": rows.shape[0], "max_epoch": int(rows[:, 1].max(initial=0)),
+                "edges_examined": int(rows[:, 3].sum()), "activations": int(rows[:, 4].sum()), "random_draws": int(rows[:, 5].sum()),
+                "seconds": float(rows[:, 6].sum() / 1e9), "tail_epochs": tail_epochs, "tail_time": tail_time}
+
+    def write(self, filepath: str):
+        # Semicolon separated like the other logs of cv7
+        with open(filepath, "w") as file:
+            file.write(";".join(EPOCH_COLUMNS) + "\n")
+            for row in self.rows:
+                file.write(";".join(str(value) for value in row) + "\n")
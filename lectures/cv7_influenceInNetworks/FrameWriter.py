@@ -0,0 +1,95 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import igraph as ig
+import numpy as np
+
+from raster import RASTER_THRESHOLD, raster_filename, render_density, should_rasterize
+
+# Graph, its edges and layout sent once to each frame rendering process
+frame_graph = None
+frame_edges = None
+frame_layout = None
+
+
+def render_frame(g: ig.Graph, layout: ig.Layout, output_filename: str, style: dict, raster_threshold: int = RASTER_THRESHOLD,
+                 edges: np.ndarray = None):
+    # Large graphs are drawn as PNG density image next to output_filename, returns name of written file
+    if should_rasterize(g.vcount(), g.ecount(), raster_threshold):
+        if edges is None:
+            edges = np.array(g.get_edgelist(), dtype=np.int64)
+        output_filename = raster_filename(output_filename)
+        render_density(layout.coords, edges, output_filename, style.get("vertex_color"))
+    else:
+        ig.plot(g, target=output_filename, layout=layout, **style)
+    return output_filename
+
+
+def init_frame_worker(g: ig.Graph, coords: list):
+    global frame_graph, frame_edges, frame_layout
+    frame_graph = g
+    frame_edges = np.array(g.get_edgelist(), dtype=np.int64)
+    frame_layout = ig.Layout(coords)
+
+
+def render_frame_in_worker(output_filename: str, style: dict, raster_threshold: int):
+    return render_frame(frame_graph, frame_layout, output_filename, style, raster_threshold, frame_edges)
+
+
+class FrameWriter:
+    def __init__(self, g: ig.Graph, coords: list, name_of_network: str, output_format: str = "pdf", max_workers: int = 2,
+                 output_directory: str = "Outputs", raster_threshold: int = RASTER_THRESHOLD):
+        # "pdf" writes one PDF per timestep, "gif" one animated GIF and "multipage" one PDF with page per timestep.
+        # Frames of graphs above raster_threshold are PNG density images, "pdf" then keeps one PNG per timestep.
+        if output_format not in ("pdf", "gif", "multipage"):
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.name_of_network = name_of_network
+        self.output_format = output_format
+        self.output_directory = output_directory
+        self.raster_threshold = raster_threshold
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=init_frame_worker, initargs=(g, coords))
+        self.futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def submit(self, timestamp: int, style: dict):
+        # Returns immediately, frame is rendered in background
+        extension = "pdf" if self.output_format == "pdf" else "png"
+        output_filename = os.path.join(self.output_directory, f"{self.name_of_network}_{timestamp}.{extension}")
+        self.futures.append(self.executor.submit(render_frame_in_worker, output_filename, style, self.raster_threshold))
+
+    def abort(self):
+        # Frames not rendered yet are dropped and rendered ones removed, so failed run leaves no partial output
+        self.executor.shutdown(cancel_futures=True)
+        for future in self.futures:
+            if future.cancelled() or future.exception() is not None:
+                continue
+            try:
+                os.remove(future.result())
+            except OSError:
+                pass
+
+    def close(self):
+        filenames = [future.result() for future in self.futures]
+        self.executor.shutdown()
+        if self.output_format == "pdf" or not filenames:
+            return
+
+        # Frames rendered to PNG are joined into one file
+        from PIL import Image
+        frames = [Image.open(filename).convert("RGB") for filename in filenames]
+        if self.output_format == "gif":
+            output_filename = os.path.join(self.output_directory, f"{self.name_of_network}.gif")
+            frames[0].save(output_filename, save_all=True, append_images=frames[1:], duration=500, loop=0)
+        else:
+            output_filename = os.path.join(self.output_directory, f"{self.name_of_network}.pdf")
+            frames[0].save(output_filename, save_all=True, append_images=frames[1:])
+        for filename in filenames:
+            os.remove(filename)
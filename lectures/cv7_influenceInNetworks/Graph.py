@@ -1,141 +1,382 @@
+import contextlib
 import igraph as ig
 import random
+import time
 import numpy as np
 
+from CSRGraph import CSRGraph, ACTIVE, INFECTED, NUMBER_OF_LANES
+from LiveEdgeSamples import LiveEdgeSamples
+from RRSets import RRSets
+from seed_selection import celf, imm
+from link_prediction import evaluate_link_prediction, predict_links
+from cache import cache_key, load_cache, load_cached_array, save_cache, save_cached_array
+from FrameWriter import FrameWriter, render_frame
+from CascadeObserver import CascadeObserver, CascadeRecorder
+from raster import RASTER_THRESHOLD
+from out_of_core import CHUNK_EDGES, build_cache, open_text
+
 
 class Graph:
-    def __init__(self, directed: bool = False, weighted: bool = True, filepath: str = None, name_of_network: str = "les_miserables"):
-        self.g = ig.Graph(directed=directed)
+    def __init__(self, directed: bool = False, weighted: bool = True, filepath: str = None, name_of_network: str = "les_miserables",
+                 seed: int = None, use_cache: bool = True, out_of_core: bool = False, chunk_edges: int = CHUNK_EDGES):
         self.color_palette = {"healthy": "green", "active": "orange", "infected": "red"}
+        self.state_names = ["healthy", "active", "infected"]
         self.name_of_network = name_of_network
         self.directed = directed
         self.weighted = weighted
+        # Array-backed copy of graph for engine="csr", built on first use
+        self.csr = None
+        # igraph object is built from arrays on first use
+        self._g = None
+        # Per vertex degree and clustering coefficient, built on first use
+        self.degrees = None
+        self.clustering_coefficients = None
+        # Live-edge samples reused by seed selection, sampled on first use
+        self.live_edge_samples = None
+        # Reverse-reachable sets of the last IMM seed selection
+        self.rr_sets = None
+        self.rng = np.random.default_rng(seed)
+        # Coordinates of vertices for plotting, computed on first use
+        self.layout = None
+        # Graphs with more vertices and edges together are plotted as PNG density images, None always uses ig.plot
+        self.raster_threshold = RASTER_THRESHOLD
+        self.filepath = filepath
 
-        if name_of_network == "les_miserables":
-            self.load_from_file(filepath)
+        key = cache_key(filepath, weighted=weighted, directed=directed) if use_cache else None
+        self.cache_key = key
+        arrays = load_cache(filepath, key) if use_cache else None
+        if arrays is None and out_of_core:
+            # Edge list is turned into cached arrays chunk by chunk and used memory-mapped, so it never has to fit in memory
+            if not use_cache:
+                raise ValueError("out_of_core needs use_cache")
+            build_cache(filepath, key, weighted, chunk_edges)
+            arrays = load_cache(filepath, key)
+        if arrays is not None:
+            # Memory-mapped arrays are shared by all processes reading the same cache
+            self.names, self.edges, self.weights = arrays["names"], arrays["edges"], arrays["weights"]
+            self.csr = CSRGraph(arrays["indptr"], arrays["indices"], arrays["csr_weights"])
+            self.degrees, self.clustering_coefficients = arrays["degrees"], arrays["clustering_coefficients"]
         else:
-            self.g = self.g.Read(filepath, "edgelist")
-            self.g.vs["weight"] = 1
-            self.g.vs["state"] = "healthy"
-            self.g.vs["number_of_infected"] = 0
+            self.load_from_file(filepath)
+            if use_cache:
+                csr = self.get_csr()
+                degrees, clustering_coefficients = self.get_structural_index()
+                save_cache(filepath, key, {"names": self.names, "edges": self.edges, "weights": self.weights,
+                                           "indptr": csr.indptr, "indices": csr.indices, "csr_weights": csr.weights,
+                                           "degrees": degrees, "clustering_coefficients": clustering_coefficients})
+
+    @property
+    def g(self):
+        if self._g is None:
+            number_of_vertices = self.get_number_of_vertices()
+            self._g = ig.Graph(n=number_of_vertices, edges=self.edges, directed=self.directed,
+                               vertex_attrs={"name": self.names.tolist(), "state": ["healthy"] * number_of_vertices,
+                                             "number_of_infected": [0] * number_of_vertices})
+            self._g.es["weight"] = self.weights.tolist()
+        return self._g
 
     def load_from_file(self, filepath: str):
-        with open(filepath, "r") as file:
+        # Vertex names interned to dense ids in order of first appearance
+        ids = {}
+        sources = []
+        targets = []
+        weights = []
+        matrix_market = filepath.endswith(".mtx") or filepath.endswith(".mtx.gz")
+        size_line_read = False
+
+        with open_text(filepath) as file:
             # for each line in file
             for line in file:
-                # ignore comment lines
-                if line.startswith('%') or line.startswith('#'):
-                    continue
                 # columns are whitespace separated
-                parsed_line = line.rstrip('\n').split()
+                parsed_line = line.split()
+                # ignore comment and empty lines
+                if not parsed_line or line[0] in "%#":
+                    continue
+
+                # Matrix Market size line "rows columns entries", vertices are 1..rows
+                if matrix_market and not size_line_read:
+                    size_line_read = True
+                    for vertex_id in range(1, int(parsed_line[0]) + 1):
+                        ids[str(vertex_id)] = vertex_id - 1
+                    continue
 
                 # parse out columns
-                id_from = (parsed_line[0])
-                id_to = (parsed_line[1])
-                weight = 1
+                id_from = ids.setdefault(parsed_line[0], len(ids))
+                id_to = ids.setdefault(parsed_line[1], len(ids))
+                sources.append(id_from)
+                targets.append(id_to)
                 if self.weighted:
-                    weight = int(parsed_line[2])
+                    weights.append(int(parsed_line[2]))
 
-                # add nodes to graph
-                if not any(v["name"] == id_from for v in self.g.vs):
-                    self.g.add_vertex(name=id_from, state="healthy", number_of_infected=0)
-                if not any(v["name"] == id_to for v in self.g.vs):
-                    self.g.add_vertex(name=id_to, state="healthy", number_of_infected=0)
+        if not self.weighted:
+            weights = [1] * len(sources)
 
-                # add edge
-                self.g.add_edge(id_from, id_to, weight=weight)
+        self.names = np.array(list(ids), dtype=str)
+        self.edges = np.column_stack((np.array(sources, dtype=np.int64), np.array(targets, dtype=np.int64)))
+        self.weights = np.array(weights, dtype=np.int64)
 
     def get_number_of_vertices(self):
-        return self.g.vcount()
+        return self.names.size
 
     def get_number_of_edges(self):
-        return self.g.ecount()
+        return self.edges.shape[0]
 
-    def plot(self, timestamp: int = 0):
-        # Create a layout for plotting
-        layout = self.g.layout("auto")
+    def get_csr(self):
+        if self.csr is None:
+            self.csr = CSRGraph.from_edges(self.get_number_of_vertices(), self.edges[:, 0], self.edges[:, 1], self.weights)
+        return self.csr
+
+    def get_layout(self):
+        # Layout is computed once per graph and kept next to cached arrays, so frames do not jump around
+        if self.layout is None:
+            self.layout = load_cached_array(self.filepath, self.cache_key, "layout")
+        if self.layout is None:
+            self.layout = np.array(self.g.layout("auto").coords, dtype=np.float64)
+            save_cached_array(self.filepath, self.cache_key, "layout", self.layout)
+        return self.layout
+
+    def get_states_of_igraph(self):
+        # State vector and infection counts of igraph engine in the form used by csr engine
+        names = np.array(self.g.vs["state"])
+        state = np.zeros(names.size, dtype=np.uint8)
+        state[names == "active"] = ACTIVE
+        state[names == "infected"] = INFECTED
+        return state, np.array(self.g.vs["number_of_infected"], dtype=np.int64)
+
+    def get_plot_style(self, state: np.ndarray, number_of_infected: np.ndarray):
         # Set the node size based on success of infection
-        vertex_sizes = [1.4 * vertex["number_of_infected"] + 10 for vertex in self.g.vs]
+        vertex_sizes = 1.4 * number_of_infected + 10
         # Set the node color based on its state
-        vertex_colors = [self.color_palette[vertex["state"]] for vertex in self.g.vs]
-        # Set vertex labels
-        vertex_labels = [v["name"] for v in self.g.vs]
+        vertex_colors = np.array([self.color_palette[name] for name in self.state_names])[state]
         # Set edge width according to its weight
-        edge_widths = [0.3 * edge["weight"] + 1 for edge in self.g.es]
+        edge_widths = 0.3 * self.weights + 1
+        return {"edge_width": edge_widths.tolist(), "vertex_size": vertex_sizes.tolist(),
+                "vertex_color": vertex_colors.tolist(), "vertex_label": self.names.tolist()}
+
+    def plot(self, timestamp: int = 0, state: np.ndarray = None, number_of_infected: np.ndarray = None):
+        if state is None:
+            state, number_of_infected = self.get_states_of_igraph()
 
         # Plot the multilayer network using matplotlib
         output_filename = rf"Outputs/{self.name_of_network}_{timestamp}.pdf"
-        ig.plot(self.g, target=output_filename, layout=layout,
-                edge_width=edge_widths, vertex_size=vertex_sizes,
-                vertex_color=vertex_colors, vertex_label=vertex_labels)
+        render_frame(self.g, ig.Layout(self.get_layout().tolist()), output_filename, self.get_plot_style(state, number_of_infected),
+                     self.raster_threshold, self.edges)
+
+    def get_frame_writer(self, output_format: str = "pdf"):
+        return FrameWriter(self.g, self.get_layout().tolist(), self.name_of_network, output_format, raster_threshold=self.raster_threshold)
+
+    def get_structural_index(self):
+        # Degree and local clustering coefficient of every vertex, computed once in bulk
+        if self.degrees is None:
+            self.degrees = self.get_csr().degree()
+            self.clustering_coefficients = np.array(self.g.transitivity_local_undirected(mode="nan"), dtype=np.float64)
+        return self.degrees, self.clustering_coefficients
 
     def pick_best_candidates(self, max_candidates: int = 1, portion_of_vertices: float = None, number_of_vertices: int = None, degree_percentile: float = 90.0,
                              clustering_coefficient_threshold: float = 0.3):
+        degrees, clustering_coefficients = self.get_structural_index()
         # Select only portion of vertices for finding candidates and hubs
         if portion_of_vertices is not None:
-            selected_vertix_ids = random.sample(range(self.g.vcount()), int(self.g.vcount() * portion_of_vertices))
+            selected_vertix_ids = random.sample(range(self.get_number_of_vertices()), int(self.get_number_of_vertices() * portion_of_vertices))
         else:
-            selected_vertix_ids = random.sample(range(self.g.vcount()), number_of_vertices)
-
-        selected_vertices = [self.g.vs[vertex_id] for vertex_id in selected_vertix_ids]
-        del selected_vertix_ids
+            selected_vertix_ids = random.sample(range(self.get_number_of_vertices()), number_of_vertices)
+        selected_vertix_ids = np.array(selected_vertix_ids, dtype=np.int64)
 
         # Set degree threshold according to percentile
-        degree_threshold = np.percentile([vertex.degree() for vertex in selected_vertices], degree_percentile)
+        selected_degrees = degrees[selected_vertix_ids]
+        degree_threshold = np.percentile(selected_degrees, degree_percentile)
+
+        # Hubs with low clustering coefficient (NaN for degree < 2 never passes)
+        candidates = selected_vertix_ids[selected_degrees >= degree_threshold]
+        candidates = candidates[clustering_coefficients[candidates] <= clustering_coefficient_threshold]
 
-        candidates = []
-        for vertex in selected_vertices:
-            degree = vertex.degree()
-            if degree >= degree_threshold:
-                clustering_coefficient = self.g.transitivity_local_undirected(vertices=vertex)
-                if clustering_coefficient <= clustering_coefficient_threshold:
-                    vertex["clustering_coefficient"] = clustering_coefficient
-                    vertex["degree"] = degree
-                    candidates.append(vertex)
+        order = np.argsort(clustering_coefficients[candidates], kind="stable")
+        return candidates[order[0:max_candidates]]
 
-        candidates.sort(key=lambda vertex: vertex["clustering_coefficient"])
+    def pick_celf_candidates(self, max_candidates: int = 1, p: float = 0.10, timesteps: int = 10, number_of_samples: int = 256,
+                             pool_size: int = 100):
+        # Greedy seeds maximizing expected spread estimated on the same live-edge samples for every candidate.
+        # Only pool_size vertices of highest degree are considered, all vertices if None. Every vertex costs about
+        # one cascade in all samples, on large graphs all vertices take hours.
+        candidates = None
+        if pool_size is not None:
+            degrees, _ = self.get_structural_index()
+            candidates = np.argsort(-degrees, kind="stable")[:pool_size]
+        return celf(self.get_live_edge_samples(number_of_samples, p), max_candidates, timesteps, candidates)
 
-        return candidates[0:max_candidates]
+    def pick_imm_candidates(self, max_candidates: int = 1, p: float = 0.10, timesteps: int = 10, epsilon: float = 0.5):
+        # Near-optimal seeds by maximum coverage of RR sets. The sets are kept in self.rr_sets, so spread of other
+        # seed sets can be estimated with self.rr_sets.estimate_spread(candidates).
+        seeds, gains, self.rr_sets = imm(self.get_csr(), max_candidates, p, timesteps, self.rng, epsilon)
+        return seeds, gains
+
+    def sample_rr_sets(self, number_of_sets: int, p: float = 0.10, timesteps: int = 10):
+        return RRSets.sample(self.get_csr(), number_of_sets, p, timesteps, self.rng)
+
+    def predict_links(self, score: str = "adamic_adar", k: int = None, threshold: float = 0.0):
+        # score is "common_neighbors", "jaccard" or "adamic_adar", returns new edges and their scores, the most similar first
+        return predict_links(self.get_csr(), score, k, threshold)
+
+    def evaluate_link_prediction(self, score: str = "adamic_adar", portion_of_edges: float = 0.1, k: int = None, threshold: float = 0.0):
+        # Confusion matrix of links predicted after holding out portion_of_edges of edges
+        return evaluate_link_prediction(self.edges, self.get_number_of_vertices(), self.rng, score, portion_of_edges, k, threshold)
+
+    def get_live_edge_samples(self, number_of_samples: int, p: float):
+        samples = self.live_edge_samples
+        if samples is None or samples.number_of_samples != number_of_samples or samples.p != p:
+            self.live_edge_samples = self.sample_live_edges(number_of_samples, p)
+        return self.live_edge_samples
 
     def reset_states(self):
-        self.g.vs["state"] = "healthy"
-        self.g.vs["number_of_infected"] = 0
+        # igraph object not built yet has all vertices healthy
+        if self._g is not None:
+            self._g.vs["state"] = "healthy"
+            self._g.vs["number_of_infected"] = 0
+        if self.csr is not None:
+            self.csr.reset_states()
 
     def IC_simulation(self, p: float = 0.10, timesteps: int = 10, max_candidates: int = 1, portion_of_vertices: float = None,
                       number_of_vertices: int = None, degree_percentile: float = 90.0,
-                      clustering_coefficient_threshold: float = 0.3, enable_plotting: bool = False):
-        candidates = self.pick_best_candidates(max_candidates, portion_of_vertices, number_of_vertices, degree_percentile, clustering_coefficient_threshold)
+                      clustering_coefficient_threshold: float = 0.3, enable_plotting: bool = False, engine: str = "igraph",
+                      plot_format: str = "pdf", seed_selection: str = "heuristic", number_of_samples: int = 256, pool_size: int = 100, epsilon: float = 0.5,
+                      observer: CascadeObserver = None, verbosity: int = 0):
+        # seed_selection "heuristic" picks hubs with low clustering coefficient, "celf" greedy maximizes estimated spread
+        # on live-edge samples and "imm" on reverse-reachable sets.
+        # observer gets statistics of every epoch. verbosity 0 prints nothing, 1 the result, 2 also summary of epochs.
+        if verbosity >= 2 and observer is None:
+            observer = CascadeRecorder()
+        if seed_selection == "heuristic":
+            candidates = self.pick_best_candidates(max_candidates, portion_of_vertices, number_of_vertices, degree_percentile,
+                                                   clustering_coefficient_threshold)
+        elif seed_selection == "celf":
+            candidates, gains = self.pick_celf_candidates(max_candidates, p, timesteps, number_of_samples, pool_size)
+            if verbosity >= 1:
+                print(f"Estimated ratio of infected vertices: {gains.sum()}")
+        elif seed_selection == "imm":
+            candidates, gains = self.pick_imm_candidates(max_candidates, p, timesteps, epsilon)
+            if verbosity >= 1:
+                print(f"Estimated ratio of infected vertices: {gains.sum()}")
+        else:
+            raise ValueError(f"Unknown seed selection: {seed_selection}")
+        if engine not in ("csr", "igraph"):
+            raise ValueError(f"Unknown engine: {engine}")
+        # Frames are rendered in background while simulation goes on, pool is shut down even if simulation fails
+        with self.get_frame_writer(plot_format) if enable_plotting else contextlib.nullcontext() as frame_writer:
+            if observer is not None:
+                observer.on_start(engine, candidates)
+            if engine == "csr":
+                ratio, epoch = self.IC_simulation_csr(candidates, p, timesteps, frame_writer, observer)
+            else:
+                ratio, epoch = self.IC_simulation_igraph(candidates, p, timesteps, frame_writer, observer)
+        if observer is not None:
+            observer.on_end(ratio, epoch)
+
+        if verbosity >= 1:
+            print(f"Number of candidates: {len(candidates)}")
+            print(f"Simulation ended in: {epoch} timestep")
+            print(f"Ratio of infected vertices: {ratio}")
+        if verbosity >= 2 and isinstance(observer, CascadeRecorder):
+            for name, value in observer.get_summary().items():
+                print(f"{name}: {value}")
+        if verbosity >= 1:
+            print()
+        return ratio
+
+    def sample_live_edges(self, number_of_samples: int, p: float = 0.10):
+        return LiveEdgeSamples.sample(self.get_csr(), number_of_samples, p, self.rng)
+
+    def IC_simulation_batch(self, number_of_runs: int, p: float = 0.10, timesteps: int = 10, max_candidates: int = 1,
+                            portion_of_vertices: float = None, number_of_vertices: int = None, degree_percentile: float = 90.0,
+                            clustering_coefficient_threshold: float = 0.3, live_edge_samples: LiveEdgeSamples = None,
+                            first_sample: int = 0):
+        # With live_edge_samples, run i is evaluated in fixed sample first_sample + i and p of samples is used.
+        # Returns ratio of infected vertices and last timestep of each run.
+        csr = self.get_csr()
+        ratios = np.empty(number_of_runs)
+        timesteps_used = np.empty(number_of_runs, dtype=np.int64)
+        # Independent runs are simulated in batches of NUMBER_OF_LANES bit-parallel runs
+        for start in range(0, number_of_runs, NUMBER_OF_LANES):
+            seed_sets = []
+            for run in range(start, min(start + NUMBER_OF_LANES, number_of_runs)):
+                candidates = self.pick_best_candidates(max_candidates, portion_of_vertices, number_of_vertices, degree_percentile,
+                                                       clustering_coefficient_threshold)
+                seed_sets.append(candidates)
+            if live_edge_samples is not None:
+                batch = live_edge_samples.evaluate_runs(seed_sets, timesteps, first_sample + start)
+            else:
+                batch = csr.simulate_batch(seed_sets, p, timesteps, self.rng)
+            ratios[start:start + len(seed_sets)], timesteps_used[start:start + len(seed_sets)] = batch
+        return ratios, timesteps_used
+
+    def IC_simulation_csr(self, candidates: np.ndarray, p: float, timesteps: int, frame_writer: FrameWriter = None,
+                          observer: CascadeObserver = None):
+        csr = self.get_csr()
+        # Set initial candidates infected
+        frontier = np.array(candidates, dtype=np.int64)
+        csr.state[frontier] = ACTIVE
+
+        if frame_writer is not None:
+            frame_writer.submit(0, self.get_plot_style(csr.state, csr.number_of_infected))
+        # for each timestep
+        for epoch in range(1, timesteps):
+            # If there arent any active vertices. Then end simulation.
+            if frontier.size == 0:
+                break
+            # Clock is read only for observer, simulation without it does no extra work
+            start = time.perf_counter_ns() if observer is not None else 0
+            frontier_size = frontier.size
+            frontier = csr.step(frontier, p, self.rng)
+            if observer is not None:
+                observer.on_epoch(epoch, frontier_size, csr.edges_examined, frontier.size, csr.random_draws, time.perf_counter_ns() - start)
+            # plot g for each timestep
+            if frame_writer is not None:
+                frame_writer.submit(epoch, self.get_plot_style(csr.state, csr.number_of_infected))
+        return csr.get_ratio_of_infected(), epoch
+
+    def IC_simulation_igraph(self, candidates: np.ndarray, p: float, timesteps: int, frame_writer: FrameWriter = None,
+                             observer: CascadeObserver = None):
         # Set initial candidates infected
         for candidate in candidates:
-            candidate["state"] = "active"
+            self.g.vs[int(candidate)]["state"] = "active"
 
-        if enable_plotting:
-            self.plot(0)
+        if frame_writer is not None:
+            # Frames are drawn from state arrays kept next to vertex attributes, the same arrays csr engine has
+            state, number_of_infected = self.get_states_of_igraph()
+            frame_writer.submit(0, self.get_plot_style(state, number_of_infected))
         # for each timestep
         for epoch in range(1, timesteps):
             active_vertices = self.g.vs.select(state="active")
             # If there arent any active vertices. Then end simulation.
             if not active_vertices:
                 break
+            start = time.perf_counter_ns() if observer is not None else 0
+            edges_examined = random_draws = activations = 0
 
             # Select all healthy neighbours
             for activated_vertix in active_vertices:
-                healthy_neighbors = [neighbor for neighbor in activated_vertix.neighbors() if neighbor["state"] =="healthy"]
+                neighbors = activated_vertix.neighbors()
+                healthy_neighbors = [neighbor for neighbor in neighbors if neighbor["state"] =="healthy"]
+                edges_examined += len(neighbors)
+                random_draws += len(healthy_neighbors)
                 for healthy_neighbor in healthy_neighbors:
                     random_float = random.uniform(0.0, 1.0)
                     # infect!
                     if random_float <= p:
                         activated_vertix["number_of_infected"] += 1
                         healthy_neighbor["state"] = "active"
+                        activations += 1
+                        if frame_writer is not None:
+                            number_of_infected[activated_vertix.index] += 1
+                            state[healthy_neighbor.index] = ACTIVE
 
             # change active to infected
             active_vertices["state"] = "infected"
+            if frame_writer is not None:
+                state[active_vertices.indices] = INFECTED
+            if observer is not None:
+                observer.on_epoch(epoch, len(active_vertices), edges_examined, activations, random_draws, time.perf_counter_ns() - start)
             # plot g for each timestep
-            if enable_plotting:
-                self.plot(epoch)
+            if frame_writer is not None:
+                frame_writer.submit(epoch, self.get_plot_style(state, number_of_infected))
         ratio = len(self.g.vs.select(state="infected")) / self.g.vcount()
-        print(f"Number of candidates: {len(candidates)}")
-        print(f"Simulation ended in: {epoch} timestep")
-        print(f"Ratio of infected vertices: {ratio}")
-        print()
-        return ratio
\ No newline at end of file
+        return ratio, epoch
\ No newline at end of file
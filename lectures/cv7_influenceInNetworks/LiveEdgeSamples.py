@@ -0,0 +1,146 @@
+import numpy as np
+
+from CSRGraph import CSRGraph, LANES_DTYPE, NUMBER_OF_LANES, count_bits, count_lanes, record_finished_lanes
+
+# Edges leaving frontier of count_reached expanded together
+MAX_CHUNK_EDGES = 1 << 22
+
+
+class LiveEdgeSamples:
+    def __init__(self, csr: CSRGraph, masks: np.ndarray, number_of_samples: int, p: float):
+        # Bit i of masks[w, e] is set if edge e of csr.indices is live in sample NUMBER_OF_LANES * w + i
+        self.csr = csr
+        self.masks = masks
+        self.number_of_samples = number_of_samples
+        self.p = p
+
+    @classmethod
+    def sample(cls, csr: CSRGraph, number_of_samples: int, p: float, rng: np.random.Generator):
+        # Each directed edge is live with probability p, the same coin flip IC makes when it tries the edge
+        number_of_words = -(-number_of_samples // NUMBER_OF_LANES)
+        all_lanes = np.full(csr.indices.size, np.iinfo(LANES_DTYPE).max, dtype=LANES_DTYPE)
+        masks = np.empty((number_of_words, csr.indices.size), dtype=LANES_DTYPE)
+        for word in range(number_of_words):
+            masks[word] = csr.random_bits(all_lanes, p, rng)
+        return cls(csr, masks, number_of_samples, p)
+
+    def save(self, filepath: str):
+        np.save(filepath, self.masks)
+
+    @classmethod
+    def load(cls, csr: CSRGraph, filepath: str, number_of_samples: int, p: float):
+        # Memory-mapped, so all processes share one copy of samples
+        return cls(csr, np.load(filepath, mmap_mode="r"), number_of_samples, p)
+
+    def get_number_of_lanes(self, word: int):
+        return min(NUMBER_OF_LANES, self.number_of_samples - NUMBER_OF_LANES * word)
+
+    def reach(self, word: int, seed_sets: list, timesteps: int, infected: np.ndarray = None):
+        # Vertices infected within timesteps in samples of one word and last timestep of each lane,
+        # run i starts from seed_sets[i] in lane i. Vertices already infected (per lane) are never reached again.
+        csr = self.csr
+        active = np.zeros(csr.get_number_of_vertices(), dtype=LANES_DTYPE)
+        if infected is None:
+            infected = np.zeros(csr.get_number_of_vertices(), dtype=LANES_DTYPE)
+        else:
+            infected = infected.copy()
+        for lane, seeds in enumerate(seed_sets):
+            active[np.asarray(seeds, dtype=np.int64)] |= LANES_DTYPE.type(1 << lane)
+        timesteps_used = np.zeros(len(seed_sets), dtype=np.int64)
+
+        # for each timestep
+        for epoch in range(1, timesteps):
+            record_finished_lanes(active, epoch, timesteps_used)
+            frontier = np.flatnonzero(active)
+            # If there arent any active vertices in any sample. Then end simulation.
+            if frontier.size == 0:
+                break
+            degrees, positions = csr.neighborhood_positions(frontier)
+            targets = csr.indices[positions]
+
+            # Samples in which source is active, edge is live and target is still healthy
+            healthy = ~(active | infected)
+            hits = np.repeat(active[frontier], degrees) & self.masks[word][positions] & healthy[targets]
+            successful = hits != 0
+
+            newly_active = np.zeros_like(active)
+            np.bitwise_or.at(newly_active, targets[successful], hits[successful])
+
+            # change active to infected
+            infected |= active
+            active = newly_active
+        timesteps_used[timesteps_used == 0] = max(timesteps - 1, 0)
+        return infected, timesteps_used
+
+    def count_reached(self, word: int, vertices: np.ndarray, timesteps: int, infected: np.ndarray, max_chunk_edges: int = MAX_CHUNK_EDGES):
+        # Number of vertices outside infected reached from each of vertices, summed over lanes of one word.
+        # Cascades of all vertices run together, frontier is kept as (cascade, vertex, lanes) triples and expanded
+        # in chunks of about max_chunk_edges edges. Cascades pass through infected vertices too, seeds infect union
+        # of their own cascades within timesteps.
+        n = self.csr.get_number_of_vertices()
+        frontier = np.asarray(vertices, dtype=np.int64)
+        cascades = np.arange(frontier.size, dtype=np.int64)
+        lanes = np.full(frontier.size, (1 << self.get_number_of_lanes(word)) - 1, dtype=LANES_DTYPE)
+        # Lanes in which vertex was reached by cascade, zeros are allocated lazily
+        visited = np.zeros((frontier.size, n), dtype=LANES_DTYPE)
+        visited[cascades, frontier] = lanes
+        counts = count_bits(lanes & ~infected[frontier])
+        if timesteps < 2:
+            # reach infects nobody before the first epoch ends
+            return np.zeros_like(counts)
+
+        # The same depth as reach, vertices activated in the last epoch are not infected yet
+        for epoch in range(1, timesteps - 1):
+            if frontier.size == 0:
+                break
+            # Frontier is split where cumulative degree crosses multiples of max_chunk_edges
+            frontier_degrees = self.csr.indptr[frontier + 1] - self.csr.indptr[frontier]
+            bounds = np.searchsorted(np.cumsum(frontier_degrees), np.arange(max_chunk_edges, frontier_degrees.sum(), max_chunk_edges))
+            bounds = np.unique(np.concatenate(([0], bounds, [frontier.size])))
+            chunks = []
+            for low, high in zip(bounds[:-1], bounds[1:]):
+                degrees, positions = self.csr.neighborhood_positions(frontier[low:high])
+                owners = np.repeat(cascades[low:high], degrees)
+                targets = self.csr.indices[positions].astype(np.int64)
+                hits = np.repeat(lanes[low:high], degrees) & self.masks[word][positions] & ~visited[owners, targets]
+                successful = hits != 0
+                chunks.append((owners[successful], targets[successful], hits[successful]))
+            owners, targets, hits = (np.concatenate(parts) for parts in zip(*chunks))
+
+            # Vertex reached from several frontier vertices of the same cascade is activated once
+            keys, inverse = np.unique(owners * n + targets, return_inverse=True)
+            lanes = np.zeros(keys.size, dtype=LANES_DTYPE)
+            np.bitwise_or.at(lanes, inverse, hits)
+            cascades, frontier = np.divmod(keys, n)
+            visited[cascades, frontier] |= lanes
+            counts += np.bincount(cascades, weights=count_bits(lanes & ~infected[frontier]), minlength=counts.size).astype(np.int64)
+        return counts
+
+    def evaluate_runs(self, seed_sets: list, timesteps: int, first_sample: int = 0):
+        # Ratio of infected vertices and last timestep of run i evaluated in sample first_sample + i.
+        # Runs sharing a sample would not be independent, so there must be a sample for every run.
+        if first_sample + len(seed_sets) > self.number_of_samples:
+            raise ValueError(f"{first_sample + len(seed_sets)} runs need as many samples, only {self.number_of_samples} were drawn")
+        ratios = np.empty(len(seed_sets))
+        timesteps_used = np.empty(len(seed_sets), dtype=np.int64)
+        run = 0
+        while run < len(seed_sets):
+            sample = first_sample + run
+            word, lane = divmod(sample, NUMBER_OF_LANES)
+            number_of_runs = min(self.get_number_of_lanes(word) - lane, len(seed_sets) - run)
+            # Runs are shifted to lanes of their samples
+            lanes = [[]] * lane + list(seed_sets[run:run + number_of_runs])
+            infected, lanes_timesteps = self.reach(word, lanes, timesteps)
+            ratios[run:run + number_of_runs] = count_lanes(infected, lane + number_of_runs)[lane:] / self.csr.get_number_of_vertices()
+            timesteps_used[run:run + number_of_runs] = lanes_timesteps[lane:]
+            run += number_of_runs
+        return ratios, timesteps_used
+
+    def estimate_spread(self, seeds: np.ndarray, timesteps: int):
+        # Expected ratio of infected vertices of one seed set, averaged over all samples
+        total = 0
+        for word in range(self.masks.shape[0]):
+            number_of_lanes = self.get_number_of_lanes(word)
+            infected, _ = self.reach(word, [seeds] * number_of_lanes, timesteps)
+            total += count_lanes(infected, number_of_lanes).sum()
+        return total / (self.number_of_samples * self.csr.get_number_of_vertices())
@@ -0,0 +1,123 @@
+import numpy as np
+
+from CSRGraph import CSRGraph, random_ranks
+
+# Upper bound on memory of visited flags of RR sets sampled together, in bytes
+MAX_BLOCK_BYTES = 1 << 26
+
+
+class RRSets:
+    def __init__(self, csr: CSRGraph, vertices: np.ndarray, offsets: np.ndarray, p: float, timesteps: int):
+        # Reverse-reachable set i is vertices[offsets[i]:offsets[i + 1]], its root comes first
+        self.csr = csr
+        self.vertices = vertices
+        self.offsets = offsets
+        self.p = p
+        self.timesteps = timesteps
+
+    @classmethod
+    def sample(cls, csr: CSRGraph, number_of_sets: int, p: float, timesteps: int, rng: np.random.Generator):
+        rr_sets = cls(csr, np.empty(0, dtype=np.int32), np.zeros(1, dtype=np.int64), p, timesteps)
+        rr_sets.extend(number_of_sets, rng)
+        return rr_sets
+
+    def get_number_of_sets(self):
+        return self.offsets.size - 1
+
+    def get_sizes(self):
+        return np.diff(self.offsets)
+
+    def extend(self, number_of_sets: int, rng: np.random.Generator):
+        # Sample new sets until there are number_of_sets of them
+        n = self.csr.get_number_of_vertices()
+        block_size = max(1, MAX_BLOCK_BYTES // n)
+        chunks = [self.vertices]
+        sizes = [self.get_sizes()]
+        missing = number_of_sets - self.get_number_of_sets()
+        while missing > 0:
+            vertices, block_sizes = self.sample_block(rng.integers(0, n, size=min(block_size, missing)), rng)
+            chunks.append(vertices)
+            sizes.append(block_sizes)
+            missing -= block_sizes.size
+        if len(chunks) > 1:
+            self.vertices = np.concatenate(chunks)
+            self.offsets = np.concatenate(([0], np.cumsum(np.concatenate(sizes))))
+
+    def sample_block(self, roots: np.ndarray, rng: np.random.Generator):
+        # Vertices which infect root within timesteps, for every root. Edge is live with probability p, as in IC.
+        # neighbors() ignores direction, so edges leading into a vertex are the ones of csr.
+        csr = self.csr
+        n = csr.get_number_of_vertices()
+        owners = np.arange(roots.size, dtype=np.int64)
+        frontier = roots.astype(np.int64)
+        visited = np.zeros((roots.size, n), dtype=bool)
+        visited[owners, frontier] = True
+        members_owners = [owners]
+        members = [frontier]
+
+        # Vertices reached in the last timestep are still active and do not count as infected
+        for _ in range(self.timesteps - 2):
+            if frontier.size == 0:
+                break
+            starts = csr.indptr[frontier]
+            degrees = csr.indptr[frontier + 1] - starts
+            ends = np.cumsum(degrees)
+            total = int(ends[-1])
+            if self.p >= 1.0:
+                ranks = np.arange(total)
+            elif self.p <= 0.0:
+                ranks = np.empty(0, dtype=np.int64)
+            else:
+                ranks = random_ranks(total, self.p, rng)
+
+            # Only live edges are drawn, ranks are mapped back to (frontier vertex, neighbour)
+            ids = np.searchsorted(ends, ranks, side="right")
+            targets = csr.indices[starts[ids] + ranks - (ends[ids] - degrees[ids])].astype(np.int64)
+            sources = owners[ids]
+            new = ~visited[sources, targets]
+            keys = np.unique(sources[new] * n + targets[new])
+            owners, frontier = np.divmod(keys, n)
+            visited[owners, frontier] = True
+            members_owners.append(owners)
+            members.append(frontier)
+
+        members_owners = np.concatenate(members_owners)
+        order = np.argsort(members_owners, kind="stable")
+        return np.concatenate(members)[order].astype(np.int32), np.bincount(members_owners, minlength=roots.size)
+
+    def get_positions(self, sets: np.ndarray):
+        # Positions in vertices of all members of sets
+        starts = self.offsets[sets]
+        sizes = self.offsets[sets + 1] - starts
+        return np.arange(int(sizes.sum()), dtype=np.int64) + np.repeat(starts - (np.cumsum(sizes) - sizes), sizes)
+
+    def estimate_spread(self, seeds: np.ndarray):
+        # Expected ratio of infected vertices is the fraction of sets hit by seeds, one pass over vertices
+        seeded = np.zeros(self.csr.get_number_of_vertices(), dtype=bool)
+        seeded[np.asarray(seeds, dtype=np.int64)] = True
+        return np.logical_or.reduceat(seeded[self.vertices], self.offsets[:-1]).mean()
+
+    def select_seeds(self, max_candidates: int):
+        # Greedy maximum coverage of sets. Returns seeds in order of selection and their marginal gains as ratio of vertices.
+        n = self.csr.get_number_of_vertices()
+        number_of_sets = self.get_number_of_sets()
+        counts = np.bincount(self.vertices, minlength=n)
+        # Sets containing vertex v are sets_of_vertices[vertex_offsets[v]:vertex_offsets[v + 1]]
+        sets_of_vertices = np.repeat(np.arange(number_of_sets), self.get_sizes())[np.argsort(self.vertices, kind="stable")]
+        vertex_offsets = np.concatenate(([0], np.cumsum(counts)))
+        covered = np.zeros(number_of_sets, dtype=bool)
+
+        seeds = []
+        gains = []
+        for _ in range(min(max_candidates, n)):
+            vertex = int(np.argmax(counts))
+            sets = sets_of_vertices[vertex_offsets[vertex]:vertex_offsets[vertex + 1]]
+            sets = sets[~covered[sets]]
+            covered[sets] = True
+            # Newly covered sets no longer count for any of their vertices
+            counts -= np.bincount(self.vertices[self.get_positions(sets)], minlength=n)
+            # Once all sets are covered, the rest of seeds are other vertices with zero gain
+            counts[vertex] = -1
+            seeds.append(vertex)
+            gains.append(sets.size / number_of_sets)
+        return np.array(seeds, dtype=np.int64), np.array(gains)
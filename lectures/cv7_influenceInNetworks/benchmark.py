@@ -0,0 +1,239 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+import igraph as ig
+import numpy as np
+
+from Graph import Graph
+from experiment import seed_graph
+
+MODELS = ("er", "ba", "ws", "penn94")
+# Size of socfb-Penn94, model "penn94" is Barabási–Albert graph with about the same number of vertices and edges
+PENN94_VERTICES = 41_554
+PENN94_EDGES = 1_362_220
+
+
+def generate_edges(model: str, number_of_vertices: int, average_degree: int, seed: int):
+    # Edges of Erdős–Rényi, Barabási–Albert or Watts–Strogatz graph, generated by igraph from seeded random module
+    random.seed(seed)
+    if model == "er":
+        g = ig.Graph.Erdos_Renyi(n=number_of_vertices, m=number_of_vertices * average_degree // 2)
+    elif model == "ba":
+        g = ig.Graph.Barabasi(number_of_vertices, m=max(1, average_degree // 2))
+    elif model == "ws":
+        g = ig.Graph.Watts_Strogatz(dim=1, size=number_of_vertices, nei=max(1, average_degree // 2), p=0.05)
+    elif model == "penn94":
+        g = ig.Graph.Barabasi(PENN94_VERTICES, m=round(PENN94_EDGES / PENN94_VERTICES))
+    else:
+        raise ValueError(f"Unknown model: {model}")
+    return np.array(g.get_edgelist(), dtype=np.int64).reshape(-1, 2)
+
+
+def write_edge_list(filepath: str, edges: np.ndarray, chunk_size: int = 1 << 20):
+    # "from to weight" lines readable by Graph.load_from_file, every edge has weight 1
+    with open(filepath + ".tmp", "w") as file:
+        for start in range(0, edges.shape[0], chunk_size):
+            chunk = edges[start:start + chunk_size]
+            file.write("".join(f"{source} {target} 1\n" for source, target in zip(chunk[:, 0].tolist(), chunk[:, 1].tolist())))
+    os.replace(filepath + ".tmp", filepath)
+
+
+def get_graph_filepath(data_directory: str, model: str, number_of_vertices: int, average_degree: int, seed: int):
+    # Graphs are generated once and reused by later runs, so every run loads the same file
+    if model == "penn94":
+        name = f"penn94_{seed}.txt"
+    else:
+        name = f"{model}_{number_of_vertices}_{average_degree}_{seed}.txt"
+    filepath = os.path.join(data_directory, name)
+    if not os.path.exists(filepath):
+        os.makedirs(data_directory, exist_ok=True)
+        write_edge_list(filepath, generate_edges(model, number_of_vertices, average_degree, seed))
+    return filepath
+
+
+def measure(function, repeat: int = 1, memory: bool = True):
+    # Best wall time of repeat calls, then peak of memory traced by tracemalloc (numpy arrays included) in one more call.
+    # Tracing slows down Python code, so it is never on while timing. Returns (seconds, peak bytes, result of last call).
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = min(seconds, time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        result = function()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak, result
+
+
+def benchmark_graph(filepath: str, seed: int, p: float, timesteps: int, numbers_of_vertices: list, maxs_candidates: list,
+                    number_of_runs: int, repeat: int, memory: bool, igraph_limit: int, weighted: bool = True):
+    # Times of hot paths of Graph on one graph, keyed by name of step
+    results = {}
+
+    def record(name: str, function, times: int = repeat):
+        seconds, peak, result = measure(function, times, memory)
+        results[name] = {"seconds": seconds, "peak_memory": peak}
+        print(f"\t{name}: {seconds:.4f} s" + (f", {peak / 2 ** 20:.1f} MiB" if peak is not None else ""))
+        return result
+
+    def reseed(g: Graph):
+        seed_graph(g, np.random.SeedSequence(seed))
+        g.reset_states()
+        return g
+
+    g = record("load", lambda: Graph(filepath=filepath, weighted=weighted, use_cache=False, seed=seed))
+    # Cache is written by the first load, only reading it is timed
+    Graph(filepath=filepath, weighted=weighted, seed=seed)
+    record("load_cached", lambda: Graph(filepath=filepath, weighted=weighted, seed=seed))
+
+    def structural_index():
+        g.degrees = None
+        return g.get_structural_index()
+    record("structural_index", structural_index)
+    number_of_vertices = min(numbers_of_vertices[0], g.get_number_of_vertices())
+    max_candidates = maxs_candidates[0]
+    candidates = record("pick_best_candidates", lambda: reseed(g).pick_best_candidates(max_candidates, number_of_vertices=number_of_vertices))
+    record("reset_states", g.reset_states)
+    record("cascade_csr", lambda: reseed(g).IC_simulation_csr(candidates, p, timesteps))
+    if g.get_number_of_vertices() <= igraph_limit:
+        record("cascade_igraph", lambda: reseed(g).IC_simulation_igraph(candidates, p, timesteps))
+
+    def sweep():
+        # (c, k) grid of IC_simulation_batch runs in this process, the same cells main.py runs on all cores
+        for c in numbers_of_vertices:
+            for k in maxs_candidates:
+                reseed(g).IC_simulation_batch(number_of_runs, p, timesteps, max_candidates=k,
+                                              number_of_vertices=min(c, g.get_number_of_vertices()))
+    record("sweep", sweep, times=1)
+    return results
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(filepath: str):
+    try:
+        with open(filepath, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return []
+
+
+def append_to_history(filepath: str, run: dict):
+    # Whole history is rewritten into temporary file and renamed, so interrupted run never corrupts it
+    history = load_history(filepath)
+    history.append(run)
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    with open(filepath + ".tmp", "w") as file:
+        json.dump(history, file, indent=1)
+    os.replace(filepath + ".tmp", filepath)
+
+
+def run_benchmarks(models: list, sizes: list, average_degree: int, seed: int, data_directory: str, p: float, timesteps: int,
+                   numbers_of_vertices: list, maxs_candidates: list, number_of_runs: int, repeat: int = 3, memory: bool = True,
+                   igraph_limit: int = 100_000, edge_list: str = None, label: str = None, edge_list_weighted: bool = True):
+    # Results of all graphs keyed "graph/step", with time and environment of the run.
+    # Synthetic graphs have weights, edge_list has them if edge_list_weighted.
+    results = {}
+    graphs = []
+    for model in models:
+        for size in ([PENN94_VERTICES] if model == "penn94" else sizes):
+            graphs.append((model if model == "penn94" else f"{model}_{size}",
+                           get_graph_filepath(data_directory, model, size, average_degree, seed), True))
+    if edge_list is not None:
+        graphs.append((os.path.basename(edge_list), edge_list, edge_list_weighted))
+
+    for name, filepath, weighted in graphs:
+        print(name)
+        for step, result in benchmark_graph(filepath, seed, p, timesteps, numbers_of_vertices, maxs_candidates, number_of_runs,
+                                            repeat, memory, igraph_limit, weighted).items():
+            results[f"{name}/{step}"] = result
+    return {"label": label, "time": datetime.datetime.now().isoformat(timespec="seconds"), "commit": get_commit(),
+            "python": platform.python_version(), "numpy": np.__version__, "igraph": ig.__version__,
+            "options": {"p": p, "timesteps": timesteps, "c": numbers_of_vertices, "k": maxs_candidates, "runs": number_of_runs,
+                        "average_degree": average_degree, "seed": seed, "repeat": repeat},
+            "results": results}
+
+
+def find_run(history: list, reference: str):
+    # Run by label, or by index into history (negative counts from the newest)
+    for run in reversed(history):
+        if run.get("label") == reference:
+            return run
+    try:
+        return history[int(reference)]
+    except (ValueError, IndexError):
+        raise ValueError(f"No run {reference} in history")
+
+
+def compare_runs(base: dict, head: dict, threshold: float = 0.1):
+    # (benchmark, metric, base value, head value, relative change, is regression) of benchmarks present in both runs.
+    # Change is regression when head is worse than base by more than threshold.
+    rows = []
+    for name in sorted(base["results"].keys() & head["results"].keys()):
+        for metric in ("seconds", "peak_memory"):
+            base_value, head_value = base["results"][name].get(metric), head["results"][name].get(metric)
+            if not base_value or head_value is None:
+                continue
+            change = head_value / base_value - 1
+            rows.append((name, metric, base_value, head_value, change, change > threshold))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks of Graph hot paths on synthetic graphs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    run = subparsers.add_parser("run", help="run benchmarks and append results to history")
+    run.add_argument("--models", nargs="+", choices=MODELS, default=["er", "ba", "ws"])
+    run.add_argument("--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000, 1_000_000])
+    run.add_argument("--average-degree", type=int, default=10)
+    run.add_argument("--edge-list", help="also benchmark this edge list, e.g. data/socfb-Penn94.mtx")
+    run.add_argument("--unweighted", dest="weighted", action="store_false", help="ignore third column of --edge-list")
+    run.add_argument("--p", type=float, default=0.05)
+    run.add_argument("--timesteps", type=int, default=100)
+    run.add_argument("--c", nargs="+", type=int, default=[100, 200, 500, 1000], help="numbers of vertices of sweep")
+    run.add_argument("--k", nargs="+", type=int, default=[2, 4, 10], help="numbers of candidates of sweep")
+    run.add_argument("--runs", type=int, default=64, help="runs of every (c, k) cell of sweep")
+    run.add_argument("--repeat", type=int, default=3, help="calls of every step, the fastest is recorded")
+    run.add_argument("--no-memory", action="store_true", help="skip measuring peak memory")
+    run.add_argument("--igraph-limit", type=int, default=100_000, help="largest graph simulated by igraph engine")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--label", help="name of run to refer to in compare")
+    run.add_argument("--data-directory", default="Outputs/benchmarks/graphs")
+    run.add_argument("--history", default="Outputs/benchmarks/history.json")
+    compare = subparsers.add_parser("compare", help="compare two runs of history and flag regressions")
+    compare.add_argument("base", nargs="?", default="-2", help="label or index of base run, the one before last by default")
+    compare.add_argument("head", nargs="?", default="-1", help="label or index of compared run, the last by default")
+    compare.add_argument("--threshold", type=float, default=0.1, help="relative slowdown or memory growth reported as regression")
+    compare.add_argument("--history", default="Outputs/benchmarks/history.json")
+    arguments = parser.parse_args()
+
+    if arguments.command == "run":
+        result = run_benchmarks(arguments.models, arguments.sizes, arguments.average_degree, arguments.seed, arguments.data_directory,
+                                arguments.p, arguments.timesteps, arguments.c, arguments.k, arguments.runs, arguments.repeat,
+                                not arguments.no_memory, arguments.igraph_limit, arguments.edge_list, arguments.label,
+                                arguments.weighted)
+        append_to_history(arguments.history, result)
+    else:
+        history = load_history(arguments.history)
+        rows = compare_runs(find_run(history, arguments.base), find_run(history, arguments.head), arguments.threshold)
+        for name, metric, base_value, head_value, change, regression in rows:
+            print(f"{'REGRESSION ' if regression else ''}{name} {metric}: {base_value:.6g} -> {head_value:.6g} ({change:+.1%})")
+        regressions = sum(row[5] for row in rows)
+        print(f"Regressions: {regressions} of {len(rows)}")
+        # Non-zero exit code lets scripts fail on regression
+        raise SystemExit(1 if regressions else 0)
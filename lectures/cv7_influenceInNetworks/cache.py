@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+# Bump when layout of cached arrays changes
+CACHE_VERSION = 2
+
+
+def cache_directory(filepath: str):
+    return filepath + ".cache"
+
+
+def cache_key(filepath: str, **options):
+    # Cache is valid only for the same source file and the same parsing options
+    stat = os.stat(filepath)
+    return {"version": CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, **options}
+
+
+def load_cache(filepath: str, key: dict):
+    # Returns dict of read-only memory-mapped arrays, or None if cache is missing or stale
+    directory = cache_directory(filepath)
+    try:
+        with open(os.path.join(directory, "key.json"), "r") as file:
+            saved_key = json.load(file)
+        names_of_arrays = saved_key.pop("arrays")
+        if saved_key != key:
+            return None
+        arrays = {}
+        for name in names_of_arrays:
+            arrays[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+        return arrays
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def temporary_cache_directory(filepath: str):
+    # Cache is written into private directory first, so concurrent readers never see half written cache
+    return f"{cache_directory(filepath)}.{os.getpid()}"
+
+
+def save_cache(filepath: str, key: dict, arrays: dict):
+    # Returns False if cache could not be written, for example next to a file in read-only directory.
+    # Cache only speeds up later loads, so caller goes on with arrays it has.
+    temporary_directory = temporary_cache_directory(filepath)
+    try:
+        os.makedirs(temporary_directory, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(temporary_directory, f"{name}.npy"), array)
+        publish_cache(filepath, key, temporary_directory, list(arrays))
+    except OSError:
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+        return False
+    return True
+
+
+def publish_cache(filepath: str, key: dict, temporary_directory: str, names_of_arrays: list):
+    # Arrays {name}.npy already written in temporary_directory become the cache of filepath
+    directory = cache_directory(filepath)
+    with open(os.path.join(temporary_directory, "key.json"), "w") as file:
+        json.dump({**key, "arrays": names_of_arrays}, file)
+
+    shutil.rmtree(directory, ignore_errors=True)
+    try:
+        os.replace(temporary_directory, directory)
+    except OSError:
+        # Other process has just written the same cache
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+
+
+def load_cached_array(filepath: str, key: dict, name: str):
+    # Single array added to a valid cache later, for example layout of graph
+    if key is None or load_cache(filepath, key) is None:
+        return None
+    try:
+        return np.load(os.path.join(cache_directory(filepath), f"{name}.npy"))
+    except OSError:
+        return None
+
+
+def save_cached_array(filepath: str, key: dict, name: str, array: np.ndarray):
+    # Stored only next to a valid cache, so it is dropped together with the cache when source changes
+    if key is None or load_cache(filepath, key) is None:
+        return
+    try:
+        np.save(os.path.join(cache_directory(filepath), f"{name}.npy"), array)
+    except OSError:
+        pass
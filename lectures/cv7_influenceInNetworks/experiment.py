@@ -0,0 +1,143 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from CSRGraph import NUMBER_OF_LANES
+from Graph import Graph
+from LiveEdgeSamples import LiveEdgeSamples
+
+# Graph and optional live-edge samples loaded once in each worker process
+worker_graph = None
+worker_live_edge_samples = None
+
+
+class RunningStatistics:
+    # Welford's online mean and variance
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def get_variance(self):
+        if self.count < 2:
+            return math.nan
+        return self.m2 / (self.count - 1)
+
+    def get_half_width(self, confidence: float = 0.95):
+        # Half width of normal approximation confidence interval of the mean
+        if self.count < 2:
+            return math.nan
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        return z * math.sqrt(self.get_variance() / self.count)
+
+
+def init_worker(graph_kwargs: dict, live_edge_samples_kwargs: dict = None):
+    global worker_graph, worker_live_edge_samples
+    worker_graph = Graph(**graph_kwargs)
+    if live_edge_samples_kwargs is not None:
+        worker_live_edge_samples = LiveEdgeSamples.load(worker_graph.get_csr(), **live_edge_samples_kwargs)
+
+
+def seed_graph(g: Graph, seed_sequence: np.random.SeedSequence):
+    # Candidates are sampled by random module, simulation draws from numpy generator
+    python_seed, numpy_seed = seed_sequence.spawn(2)
+    random.seed(int(python_seed.generate_state(1)[0]))
+    g.rng = np.random.default_rng(numpy_seed)
+
+
+def check_number_of_samples(number_of_runs: int, live_edge_samples_kwargs: dict):
+    # Every run of a cell gets its own sample, so runs stay independent
+    if live_edge_samples_kwargs is not None and number_of_runs > live_edge_samples_kwargs["number_of_samples"]:
+        raise ValueError(f"{number_of_runs} runs need as many live-edge samples, only {live_edge_samples_kwargs['number_of_samples']} were saved")
+
+
+def make_seed_sequence(seed: int, number_of_vertices: int, max_candidates: int, first_run: int):
+    # Seed depends only on (c, k, run), not on worker which gets the task
+    return np.random.SeedSequence(seed, spawn_key=(number_of_vertices, max_candidates, first_run))
+
+
+def run_batch(number_of_vertices: int, max_candidates: int, first_run: int, number_of_runs: int, seed_sequence: np.random.SeedSequence,
+              simulation_kwargs: dict):
+    # Returns (run, ratio, timesteps used, wall time, first run) of each run, wall time of batch is split evenly between its runs.
+    # first_run is the last part of spawn key of seed_sequence, so every row tells how its batch was seeded.
+    seed_graph(worker_graph, seed_sequence)
+    start = time.perf_counter()
+    ratios, timesteps_used = worker_graph.IC_simulation_batch(number_of_runs, max_candidates=max_candidates,
+                                                              number_of_vertices=number_of_vertices,
+                                                              live_edge_samples=worker_live_edge_samples, first_sample=first_run,
+                                                              **simulation_kwargs)
+    wall_time = (time.perf_counter() - start) / number_of_runs
+    return [(first_run + i, float(ratio), int(timesteps), wall_time, first_run) for i, (ratio, timesteps) in enumerate(zip(ratios, timesteps_used))]
+
+
+def run_task(task: tuple):
+    number_of_vertices, max_candidates, first_run, number_of_runs, seed_sequence, simulation_kwargs = task
+    rows = run_batch(number_of_vertices, max_candidates, first_run, number_of_runs, seed_sequence, simulation_kwargs)
+    return [(number_of_vertices, max_candidates, *row) for row in rows]
+
+
+def make_tasks(numbers_of_vertices: list, maxs_candidates: list, number_of_runs: int, seed: int, runs_per_task: int,
+               simulation_kwargs: dict):
+    tasks = []
+    # c
+    for number_of_vertices in numbers_of_vertices:
+        # k
+        for max_candidates in maxs_candidates:
+            # runs are split into tasks of runs_per_task runs
+            for first_run in range(0, number_of_runs, runs_per_task):
+                tasks.append((number_of_vertices, max_candidates, first_run, min(runs_per_task, number_of_runs - first_run),
+                              make_seed_sequence(seed, number_of_vertices, max_candidates, first_run), simulation_kwargs))
+    return tasks
+
+
+def run_grid(graph_kwargs: dict, numbers_of_vertices: list, maxs_candidates: list, number_of_runs: int, seed: int = 0,
+             max_workers: int = None, runs_per_task: int = NUMBER_OF_LANES, live_edge_samples_kwargs: dict = None, **simulation_kwargs):
+    # Yields (c, k, run, ratio, timesteps used, wall time, first run of batch) in grid order, each as soon as it and all before it are finished.
+    # With live_edge_samples_kwargs (filepath, number_of_samples, p of saved samples) run i of every cell uses sample i.
+    check_number_of_samples(number_of_runs, live_edge_samples_kwargs)
+    tasks = make_tasks(numbers_of_vertices, maxs_candidates, number_of_runs, seed, runs_per_task, simulation_kwargs)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                             initargs=(graph_kwargs, live_edge_samples_kwargs)) as executor:
+        for results in executor.map(run_task, tasks):
+            yield from results
+
+
+def run_adaptive_task(task: tuple):
+    number_of_vertices, max_candidates, seed, tolerance, confidence, min_runs, max_runs, runs_per_task, simulation_kwargs = task
+    statistics = RunningStatistics()
+    rows = []
+    # Add batches of runs until confidence interval is narrow enough
+    while statistics.count < max_runs:
+        first_run = statistics.count
+        for row in run_batch(number_of_vertices, max_candidates, first_run, min(runs_per_task, max_runs - first_run),
+                             make_seed_sequence(seed, number_of_vertices, max_candidates, first_run), simulation_kwargs):
+            statistics.add(row[1])
+            rows.append(row)
+        if statistics.count >= min_runs and statistics.get_half_width(confidence) <= tolerance:
+            break
+    return number_of_vertices, max_candidates, rows, statistics.count, statistics.mean, statistics.get_half_width(confidence)
+
+
+def run_adaptive_grid(graph_kwargs: dict, numbers_of_vertices: list, maxs_candidates: list, tolerance: float, min_runs: int = NUMBER_OF_LANES,
+                      max_runs: int = 1000, confidence: float = 0.95, seed: int = 0, max_workers: int = None,
+                      runs_per_task: int = NUMBER_OF_LANES, live_edge_samples_kwargs: dict = None, **simulation_kwargs):
+    # Yields (c, k, rows, number of runs, mean ratio, confidence interval half width) for each cell in grid order,
+    # rows are (run, ratio, timesteps used, wall time, first run of batch)
+    if max_runs < 1:
+        raise ValueError(f"max_runs must be positive: {max_runs}")
+    check_number_of_samples(max_runs, live_edge_samples_kwargs)
+    tasks = [(number_of_vertices, max_candidates, seed, tolerance, confidence, min_runs, max_runs, runs_per_task, simulation_kwargs)
+             for number_of_vertices in numbers_of_vertices for max_candidates in maxs_candidates]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                             initargs=(graph_kwargs, live_edge_samples_kwargs)) as executor:
+        yield from executor.map(run_adaptive_task, tasks)
@@ -0,0 +1,167 @@
+import heapq
+
+import numpy as np
+
+from CSRGraph import CSRGraph
+
+# Paths u - w - v expanded together for one block of rows of A·A
+MAX_BLOCK_PATHS = 1 << 24
+SCORES = ("common_neighbors", "jaccard", "adamic_adar")
+
+
+def pair_keys(edges: np.ndarray, number_of_vertices: int):
+    # Sorted unique keys u * n + v of undirected pairs u < v, self loops and repeated edges are dropped
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    low, high = edges.min(axis=1), edges.max(axis=1)
+    keys = low * number_of_vertices + high
+    return np.unique(keys[low != high])
+
+
+def keys_to_edges(keys: np.ndarray, number_of_vertices: int):
+    return np.column_stack((keys // number_of_vertices, keys % number_of_vertices))
+
+
+def simple_csr(csr: CSRGraph):
+    # Neighbours without repeats and self loops, sorted in every row, the same sets C# GetNeighbors() returns
+    n = csr.get_number_of_vertices()
+    sources = np.repeat(np.arange(n, dtype=np.int64), np.diff(csr.indptr))
+    keys = np.unique(sources * n + csr.indices)
+    sources, targets = keys // n, keys % n
+    keep = sources != targets
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources[keep], minlength=n), out=indptr[1:])
+    return CSRGraph(indptr, targets[keep].astype(np.int32))
+
+
+def row_blocks(csr: CSRGraph, max_block_paths: int = MAX_BLOCK_PATHS):
+    # Consecutive ranges of rows, each with about max_block_paths paths of length 2, a heavier row gets a block alone.
+    # indices are read in chunks, so they may be memory-mapped.
+    degrees = csr.degree()
+    paths = np.zeros(degrees.size)
+    for start in range(0, csr.indices.size, max_block_paths):
+        positions = np.arange(start, min(start + max_block_paths, csr.indices.size))
+        sources = np.searchsorted(csr.indptr, positions, side="right") - 1
+        paths += np.bincount(sources, weights=degrees[csr.indices[positions]], minlength=degrees.size)
+    ends = np.searchsorted(np.cumsum(paths), np.arange(1, int(paths.sum() // max_block_paths) + 1) * max_block_paths, side="right")
+    bounds = np.unique(np.concatenate(([0], ends, [degrees.size])))
+    return zip(bounds[:-1], bounds[1:])
+
+
+def score_block(csr: CSRGraph, start: int, end: int, score: str):
+    # Scores of pairs (u, v), start <= u < end, u < v, not joined by an edge and with at least one common neighbour.
+    # Row block of A·A for common neighbours and Jaccard, of A·D⁻¹·Aᵀ with D = diag(log degree) for Adamic-Adar.
+    n = csr.get_number_of_vertices()
+    degrees = csr.degree()
+    rows = np.arange(start, end, dtype=np.int64)
+    row_degrees, positions = csr.neighborhood_positions(rows)
+    middles = csr.indices[positions].astype(np.int64)
+    middle_degrees, second_positions = csr.neighborhood_positions(middles)
+    path_rows = np.repeat(np.repeat(rows, row_degrees), middle_degrees)
+    path_columns = csr.indices[second_positions].astype(np.int64)
+
+    upper = path_rows < path_columns
+    keys = path_rows[upper] * n + path_columns[upper]
+    if score == "adamic_adar":
+        # Ends of the remaining paths differ and csr has no repeated edges, so their middle has degree at least 2
+        # and log is positive
+        path_middles = np.repeat(middles, middle_degrees)[upper]
+        weights = 1.0 / np.log(degrees[path_middles])
+    else:
+        weights = None
+    keys, inverse = np.unique(keys, return_inverse=True)
+    scores = np.bincount(inverse, weights=weights, minlength=keys.size).astype(np.float64)
+
+    # Pairs already joined by an edge are not predicted
+    edge_keys = np.repeat(rows, row_degrees) * n + middles
+    new = ~np.isin(keys, edge_keys)
+    keys, scores = keys[new], scores[new]
+    if score == "jaccard":
+        # |N(u) ∩ N(v)| / |N(u) ∪ N(v)|
+        scores = scores / (degrees[keys // n] + degrees[keys % n] - scores)
+    return keys, scores
+
+
+def predict_links(csr: CSRGraph, score: str = "adamic_adar", k: int = None, threshold: float = 0.0,
+                  max_block_paths: int = MAX_BLOCK_PATHS):
+    # Pairs of vertices not joined by an edge with similarity above threshold, the k most similar if k is given.
+    # Rows are scored block by block and only the best k pairs are kept between blocks, so memory is bounded by
+    # size of one block and k. Returns edges (u < v) and their scores, from the most similar, ties by smaller pair.
+    if score not in SCORES:
+        raise ValueError(f"Unknown score: {score}")
+    n = csr.get_number_of_vertices()
+    if k is not None and k <= 0:
+        return keys_to_edges(np.zeros(0, dtype=np.int64), n), np.zeros(0, dtype=np.float64)
+    csr = simple_csr(csr)
+    heap = []
+    kept_keys, kept_scores = [], []
+    for start, end in row_blocks(csr, max_block_paths):
+        keys, scores = score_block(csr, start, end, score)
+        above = scores > threshold
+        keys, scores = keys[above], scores[above]
+        if k is None:
+            kept_keys.append(keys)
+            kept_scores.append(scores)
+            continue
+        # Best k of block first, then the heap holding the best k so far, its root is the worst of them
+        if heap and len(heap) == k:
+            better = scores >= heap[0][0]
+            keys, scores = keys[better], scores[better]
+        order = np.lexsort((keys, -scores))[:k]
+        for key, value in zip(keys[order].tolist(), scores[order].tolist()):
+            if len(heap) < k:
+                heapq.heappush(heap, (value, -key))
+            elif (value, -key) > heap[0]:
+                heapq.heapreplace(heap, (value, -key))
+            else:
+                # Rest of block is ordered, none of it gets into the heap
+                break
+
+    if k is not None:
+        keys = np.array([-key for _, key in heap], dtype=np.int64)
+        scores = np.array([value for value, _ in heap], dtype=np.float64)
+    else:
+        keys = np.concatenate(kept_keys) if kept_keys else np.zeros(0, dtype=np.int64)
+        scores = np.concatenate(kept_scores) if kept_scores else np.zeros(0, dtype=np.float64)
+    order = np.lexsort((keys, -scores))
+    return keys_to_edges(keys[order], n), scores[order]
+
+
+def split_edges(edges: np.ndarray, portion_of_edges: float, rng: np.random.Generator, number_of_vertices: int):
+    # Random portion of distinct edges is held out, the rest is the training graph
+    keys = pair_keys(edges, number_of_vertices)
+    held_out = rng.random(keys.size) < portion_of_edges
+    return keys_to_edges(keys[~held_out], number_of_vertices), keys_to_edges(keys[held_out], number_of_vertices)
+
+
+def compare(predicted_edges: np.ndarray, true_edges: np.ndarray, number_of_vertices: int):
+    # Confusion matrix over all pairs u < v of vertices, the same counts as C# Graph.Compare
+    # TP: Exists and predicted
+    # FN: Exists and not predicted
+    # FP: Not exists and predicted
+    # TN: Not exists and not predicted
+    predicted = pair_keys(predicted_edges, number_of_vertices)
+    true = pair_keys(true_edges, number_of_vertices)
+    tp = np.intersect1d(predicted, true, assume_unique=True).size
+    fp = predicted.size - tp
+    fn = true.size - tp
+    tn = number_of_vertices * (number_of_vertices - 1) // 2 - tp - fp - fn
+    return {"TP": tp, "FN": fn, "FP": fp, "TN": tn}
+
+
+def get_metrics(confusion_matrix: dict):
+    def ratio(numerator: int, denominator: int):
+        return numerator / denominator if denominator > 0 else float("nan")
+
+    tp, fn, fp, tn = confusion_matrix["TP"], confusion_matrix["FN"], confusion_matrix["FP"], confusion_matrix["TN"]
+    return {"Sensitivity": ratio(tp, tp + fn), "Specificity": ratio(tn, fp + tn), "Precision": ratio(tp, tp + fp),
+            "Fallout": ratio(fp, fp + tn), "Accuracy": ratio(tp + tn, tp + tn + fp + fn)}
+
+
+def evaluate_link_prediction(edges: np.ndarray, number_of_vertices: int, rng: np.random.Generator, score: str = "adamic_adar",
+                             portion_of_edges: float = 0.1, k: int = None, threshold: float = 0.0):
+    # Links are predicted on the graph without held-out edges, by default as many as were held out. The training graph
+    # with predicted links is compared with the whole graph, the same way C# PredictLinks result is compared.
+    train_edges, held_out_edges = split_edges(edges, portion_of_edges, rng, number_of_vertices)
+    csr = CSRGraph.from_edges(number_of_vertices, train_edges[:, 0], train_edges[:, 1])
+    predicted_edges, _ = predict_links(csr, score, held_out_edges.shape[0] if k is None else k, threshold)
+    return compare(np.concatenate((train_edges, predicted_edges)), edges, number_of_vertices)
@@ -1,8 +1,6 @@
 from Graph import Graph
-
-def log_to_file(filepath: str, avg_ratio: float,  max_candidates: int, number_of_vertices: int):
-    with open(filepath, "a") as file:
-        file.write(f"{avg_ratio};{max_candidates};{number_of_vertices}\n")
+from experiment import run_adaptive_grid
+from results import ResultsWriter, log_cell_to_file, results_filepath
 
 
 if __name__ == '__main__':
@@ -13,31 +11,28 @@ if __name__ == '__main__':
     ratio = g.IC_simulation(p=0.2, timesteps=1000, max_candidates=2,
                             portion_of_vertices=1.0, number_of_vertices=None,
                             degree_percentile=90.0, clustering_coefficient_threshold=0.3,
-                            enable_plotting=True)
+                            enable_plotting=True, verbosity=1)
     print(f"Portion of infected vertices: {ratio}")
 
     # FB of Pennsylvania
-    g = Graph(filepath=r"data/socfb-Penn94.mtx", name_of_network="fb_pen", weighted=False)
+    fb_pen = {"filepath": r"data/socfb-Penn94.mtx", "name_of_network": "fb_pen", "weighted": False}
+    g = Graph(**fb_pen)
     print(f"Number of vertices: {g.get_number_of_vertices()}")
     print(f"Number of edges: {g.get_number_of_edges()}")
 
-    number_of_runs = 1000
+    max_number_of_runs = 1000
     numbers_of_vertices = [100, 200, 500, 1000]
     maxs_candidates = [10, 2, 4]
 
-    # c
-    for number_of_vertices in numbers_of_vertices:
-        # k
-        for max_candidates in maxs_candidates:
-            # each run
-            for iteration in range(0, number_of_runs):
-                # Run simulation
-                ratio = g.IC_simulation(p=0.01, timesteps=1000, max_candidates=max_candidates, portion_of_vertices=None,
-                                        number_of_vertices=number_of_vertices, degree_percentile=90.0,
-                                        clustering_coefficient_threshold=0.5,
-                                        enable_plotting=False)
-                # Log results of simulation
-                log_to_file(r"Outputs/log.txt", ratio, max_candidates, number_of_vertices)
-
-                # Reset states after simulation
-                g.reset_states()
+    seed = 0
+
+    with ResultsWriter(results_filepath(r"Outputs/results")) as results:
+        # (c, k) cells simulated on all cores, each until its mean ratio is known to +-0.002
+        for number_of_vertices, max_candidates, rows, number_of_runs, mean_ratio, half_width in run_adaptive_grid(
+                fb_pen, numbers_of_vertices, maxs_candidates, tolerance=0.002, min_runs=128, max_runs=max_number_of_runs, seed=seed,
+                p=0.01, timesteps=1000, portion_of_vertices=None, degree_percentile=90.0, clustering_coefficient_threshold=0.5):
+            # Log results of simulation
+            for run, ratio, timesteps, wall_time, first_run in rows:
+                results.write(ratio, max_candidates, number_of_vertices, run, seed, first_run, timesteps, wall_time)
+            log_cell_to_file(r"Outputs/cells.txt", max_candidates, number_of_vertices, number_of_runs, mean_ratio, half_width, seed,
+                             sorted({row[4] for row in rows}))
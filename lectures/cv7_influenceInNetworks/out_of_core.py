@@ -0,0 +1,225 @@
+import gzip
+import io
+import itertools
+import os
+import shutil
+
+import numpy as np
+
+from CSRGraph import CSRGraph
+from cache import publish_cache, temporary_cache_directory
+from link_prediction import MAX_BLOCK_PATHS, row_blocks
+
+# Lines parsed and sorted together, and entries of CSR merged together
+CHUNK_EDGES = 1 << 22
+# Reverse copy of edge is ordered after all forward copies of the same source, the same order CSRGraph.from_edges gives
+DIRECTION_BIT = np.int64(1) << np.int64(40)
+
+
+def open_text(filepath: str):
+    if filepath.endswith(".gz"):
+        return gzip.open(filepath, "rt")
+    return open(filepath, "r")
+
+
+def read_edge_chunks(filepath: str, weighted: bool, ids: dict, chunk_edges: int = CHUNK_EDGES):
+    # Yields (sources, targets, weights) of up to chunk_edges lines at a time. Vertex names are interned into ids
+    # in order of first appearance, the same ids Graph.load_from_file gives.
+    # pandas is imported here, so importing Graph does not pay for it.
+    import pandas as pd
+    matrix_market = filepath.endswith(".mtx") or filepath.endswith(".mtx.gz")
+    size_line_read = not matrix_market
+    with open_text(filepath) as file:
+        while True:
+            lines = list(itertools.islice(file, chunk_edges))
+            if not lines:
+                break
+            # ignore comment and empty lines
+            lines = [line for line in lines if line.strip() and line[0] not in "%#"]
+            if not size_line_read and lines:
+                # Matrix Market size line "rows columns entries", vertices are 1..rows
+                size_line_read = True
+                for vertex_id in range(1, int(lines.pop(0).split()[0]) + 1):
+                    ids[str(vertex_id)] = vertex_id - 1
+            if not lines:
+                continue
+
+            # Vertex names such as NA or null are kept as they are, not read as missing values
+            table = pd.read_csv(io.StringIO("".join(lines)), sep=r"\s+", header=None, dtype=str,
+                                usecols=[0, 1, 2] if weighted else [0, 1], keep_default_na=False, na_filter=False)
+            names = np.column_stack((table[0].to_numpy(), table[1].to_numpy())).ravel()
+            for name in pd.unique(names):
+                if name not in ids:
+                    ids[name] = len(ids)
+            codes = pd.Series(names).map(ids).to_numpy(dtype=np.int64).reshape(-1, 2)
+            if weighted:
+                weights = table[2].astype(np.int64).to_numpy()
+            else:
+                weights = np.ones(len(table), dtype=np.int64)
+            yield codes[:, 0], codes[:, 1], weights
+
+
+def spill_run(directory: str, run: int, sources: np.ndarray, targets: np.ndarray, weights: np.ndarray, first_edge: int):
+    # Both copies of every edge of chunk sorted by (source, direction, position in file) and saved as one run
+    positions = np.arange(first_edge, first_edge + sources.size, dtype=np.int64)
+    all_sources = np.concatenate((sources, targets))
+    order = np.argsort(all_sources, kind="stable")
+    arrays = {"sources": all_sources[order], "targets": np.concatenate((targets, sources))[order].astype(np.int32),
+              "weights": np.concatenate((weights, weights))[order].astype(np.float64),
+              "keys": np.concatenate((positions, positions + DIRECTION_BIT))[order]}
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"run_{run}_{name}.npy"), array)
+
+
+def load_run(directory: str, run: int):
+    return {name: np.load(os.path.join(directory, f"run_{run}_{name}.npy"), mmap_mode="r")
+            for name in ("sources", "targets", "weights", "keys")}
+
+
+def merge_runs(directory: str, number_of_runs: int, indptr: np.ndarray, indices: np.ndarray, csr_weights: np.ndarray,
+               chunk_edges: int = CHUNK_EDGES):
+    # Rows of CSR are written in order, block by block. Each run is sorted by source, so the part of every run
+    # belonging to a block of rows is one slice found by binary search.
+    runs = [load_run(directory, run) for run in range(number_of_runs)]
+    for start, end in row_ranges(indptr, chunk_edges):
+        parts = []
+        for run in runs:
+            low, high = np.searchsorted(run["sources"], [start, end])
+            parts.append({name: np.asarray(array[low:high]) for name, array in run.items()})
+        sources = np.concatenate([part["sources"] for part in parts])
+        keys = np.concatenate([part["keys"] for part in parts])
+        order = np.lexsort((keys, sources))
+        indices[indptr[start]:indptr[end]] = np.concatenate([part["targets"] for part in parts])[order]
+        csr_weights[indptr[start]:indptr[end]] = np.concatenate([part["weights"] for part in parts])[order]
+
+
+def copy_raw(raw_filepath: str, output_filepath: str, dtype: np.dtype, shape: tuple, chunk_edges: int = CHUNK_EDGES):
+    # Raw array appended chunk by chunk becomes .npy file without being loaded whole
+    raw = np.memmap(raw_filepath, dtype=dtype, mode="r", shape=shape) if shape[0] > 0 else np.zeros(shape, dtype=dtype)
+    output = np.lib.format.open_memmap(output_filepath, mode="w+", dtype=dtype, shape=shape)
+    for start in range(0, shape[0], chunk_edges):
+        output[start:start + chunk_edges] = raw[start:start + chunk_edges]
+    output.flush()
+    del raw, output
+
+
+def row_ranges(indptr: np.ndarray, max_entries: int):
+    # Consecutive ranges of rows with about max_entries entries of CSR each, a longer row gets a range alone
+    ends = np.searchsorted(indptr, np.arange(max_entries, indptr[-1], max_entries), side="right") - 1
+    bounds = np.unique(np.concatenate(([0], ends, [indptr.size - 1])))
+    return zip(bounds[:-1], bounds[1:])
+
+
+def distinct_neighbors(csr: CSRGraph, start: int, end: int):
+    # Pairs (u, w) of rows start <= u < end and their neighbours w != u without repeats, sorted
+    n = csr.get_number_of_vertices()
+    rows = np.arange(start, end, dtype=np.int64)
+    degrees, positions = csr.neighborhood_positions(rows)
+    keys = np.unique(np.repeat(rows, degrees) * n + csr.indices[positions])
+    sources, targets = keys // n, keys % n
+    return sources[sources != targets], targets[sources != targets]
+
+
+def local_clustering_coefficients(csr: CSRGraph, max_block_paths: int = MAX_BLOCK_PATHS, scratch_filepath: str = None):
+    # Local clustering coefficient of every vertex computed from CSR in blocks of rows, the same values as igraph
+    # transitivity_local_undirected(mode="nan"), which ignores repeated edges and self loops.
+    # Edges are oriented from lower to higher (degree, id), so every triangle is found once from its lowest vertex,
+    # the oriented copy of graph goes to scratch_filepath if given.
+    n = csr.get_number_of_vertices()
+    simple_degrees = np.zeros(n, dtype=np.int64)
+    for start, end in row_ranges(csr.indptr, max_block_paths):
+        sources, _ = distinct_neighbors(csr, start, end)
+        simple_degrees[start:end] = np.bincount(sources - start, minlength=end - start)
+
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), simple_degrees))] = np.arange(n)
+    number_of_edges = int(simple_degrees.sum()) // 2
+    if scratch_filepath is not None:
+        oriented_indices = np.lib.format.open_memmap(scratch_filepath, mode="w+", dtype=np.int32, shape=(number_of_edges,))
+    else:
+        oriented_indices = np.empty(number_of_edges, dtype=np.int32)
+    oriented_indptr = np.zeros(n + 1, dtype=np.int64)
+    position = 0
+    for start, end in row_ranges(csr.indptr, max_block_paths):
+        sources, targets = distinct_neighbors(csr, start, end)
+        forward = rank[targets] > rank[sources]
+        sources, targets = sources[forward], targets[forward]
+        oriented_indices[position:position + targets.size] = targets
+        oriented_indptr[start + 1:end + 1] = position + np.cumsum(np.bincount(sources - start, minlength=end - start))
+        position += targets.size
+    oriented = CSRGraph(oriented_indptr, oriented_indices)
+
+    # Path u -> w -> v closes triangle when u -> v is an edge too, all three vertices get it
+    triangles = np.zeros(n, dtype=np.int64)
+    for start, end in row_blocks(oriented, max_block_paths):
+        rows = np.arange(start, end, dtype=np.int64)
+        degrees, positions = oriented.neighborhood_positions(rows)
+        if positions.size == 0:
+            continue
+        sources, middles = np.repeat(rows, degrees), oriented.indices[positions].astype(np.int64)
+        middle_degrees, second_positions = oriented.neighborhood_positions(middles)
+        path_ids = np.repeat(np.arange(middles.size), middle_degrees)
+        targets = oriented.indices[second_positions].astype(np.int64)
+        # Rows are sorted and so are their neighbours, keys of edges of block are sorted
+        keys = sources * n + middles
+        path_keys = sources[path_ids] * n + targets
+        found = np.minimum(np.searchsorted(keys, path_keys), keys.size - 1)
+        closed = keys[found] == path_keys
+        for corners in (sources[path_ids[closed]], middles[path_ids[closed]], targets[closed]):
+            triangles += np.bincount(corners, minlength=n)
+    del oriented, oriented_indices
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        clustering_coefficients = 2.0 * triangles / (simple_degrees * (simple_degrees - 1))
+    clustering_coefficients[simple_degrees < 2] = np.nan
+    return clustering_coefficients
+
+
+def build_cache(filepath: str, key: dict, weighted: bool = True, chunk_edges: int = CHUNK_EDGES):
+    # Builds the cache Graph loads (cache.py) from edge list without holding more than about chunk_edges edges in memory.
+    # Chunks of lines are sorted and spilled to disk as runs, which are merged into CSR arrays written straight to .npy files.
+    # Only arrays with one value per vertex are kept in memory.
+    directory = temporary_cache_directory(filepath)
+    runs_directory = os.path.join(directory, "runs")
+    os.makedirs(runs_directory, exist_ok=True)
+
+    ids = {}
+    counts = np.zeros(0, dtype=np.int64)
+    number_of_runs = 0
+    number_of_edges = 0
+    with open(os.path.join(runs_directory, "edges.bin"), "wb") as edges_file, \
+            open(os.path.join(runs_directory, "weights.bin"), "wb") as weights_file:
+        for sources, targets, weights in read_edge_chunks(filepath, weighted, ids, chunk_edges):
+            edges_file.write(np.column_stack((sources, targets)).tobytes())
+            weights_file.write(weights.tobytes())
+            # Degrees counted the same way as CSRGraph.from_edges, both ends of every edge
+            counts = np.pad(counts, (0, len(ids) - counts.size))
+            counts += np.bincount(sources, minlength=len(ids)) + np.bincount(targets, minlength=len(ids))
+            spill_run(runs_directory, number_of_runs, sources, targets, weights, number_of_edges)
+            number_of_runs += 1
+            number_of_edges += sources.size
+    counts = np.pad(counts, (0, len(ids) - counts.size))
+
+    np.save(os.path.join(directory, "names.npy"), np.array(list(ids), dtype=str))
+    del ids
+    copy_raw(os.path.join(runs_directory, "edges.bin"), os.path.join(directory, "edges.npy"), np.int64, (number_of_edges, 2), chunk_edges)
+    copy_raw(os.path.join(runs_directory, "weights.bin"), os.path.join(directory, "weights.npy"), np.int64, (number_of_edges,), chunk_edges)
+
+    indptr = np.zeros(counts.size + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    np.save(os.path.join(directory, "indptr.npy"), indptr)
+    indices = np.lib.format.open_memmap(os.path.join(directory, "indices.npy"), mode="w+", dtype=np.int32, shape=(2 * number_of_edges,))
+    csr_weights = np.lib.format.open_memmap(os.path.join(directory, "csr_weights.npy"), mode="w+", dtype=np.float64,
+                                            shape=(2 * number_of_edges,))
+    merge_runs(runs_directory, number_of_runs, indptr, indices, csr_weights, chunk_edges)
+    indices.flush()
+    csr_weights.flush()
+
+    csr = CSRGraph(indptr, indices, csr_weights)
+    np.save(os.path.join(directory, "degrees.npy"), csr.degree())
+    np.save(os.path.join(directory, "clustering_coefficients.npy"),
+            local_clustering_coefficients(csr, scratch_filepath=os.path.join(runs_directory, "oriented_indices.npy")))
+    shutil.rmtree(runs_directory)
+    del csr, indices, csr_weights
+    publish_cache(filepath, key, directory, ["names", "edges", "weights", "indptr", "indices", "csr_weights", "degrees",
+                                             "clustering_coefficients"])
@@ -1,22 +1,31 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
-import pandas as pd
 
-def plot_boxplots(input_filepath: str, output_filepath: str, k: int):
-    df = pd.read_csv(input_filepath, sep=';', names=["ratio", "k", "c"])
-    df = df.loc[(df.k == k)]
-    df['combined'] = "k=" + df['k'].astype(str) + ', ' + "c=" + df['c'].astype(str)
+from results import results_filepath
+from summaries import summarize_results
+
+def plot_boxplots(summaries: dict, output_filepath: str, k: int):
+    # Boxes are drawn from per (k, c) summaries, raw results are not needed
+    stats = [sketch.get_box_stats(label=f"k={cell_k}, c={c}") for (cell_k, c), sketch in summaries.items() if cell_k == k]
+    if not stats:
+        return
 
     # Box plot
     plt.figure(figsize=(8, 6))
-    sns.boxplot(data=df, x="combined", y="ratio", hue="combined")
+    boxes = plt.gca().bxp(stats, patch_artist=True)
+    for box, color in zip(boxes["boxes"], sns.color_palette(n_colors=len(stats))):
+        box.set_facecolor(color)
     plt.title("Ratio of \"infected\" portion of nodes.")
+    plt.xlabel("combined")
+    plt.ylabel("ratio")
     plt.grid(True)
     plt.savefig(output_filepath, format="pdf")
     plt.close()
 
 
-
-plot_boxplots(r"Outputs/log.txt", r"Outputs/plot_k2.pdf", 2)
-plot_boxplots(r"Outputs/log.txt", r"Outputs/plot_k4.pdf", 4)
-plot_boxplots(r"Outputs/log.txt", r"Outputs/plot_k10.pdf", 10)
\ No newline at end of file
+if __name__ == '__main__':
+    # Results are read only once for all plots
+    summaries = summarize_results(results_filepath(r"Outputs/results"))
+    plot_boxplots(summaries, r"Outputs/plot_k2.pdf", 2)
+    plot_boxplots(summaries, r"Outputs/plot_k4.pdf", 4)
+    plot_boxplots(summaries, r"Outputs/plot_k10.pdf", 10)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+
+import matplotlib.colors as mcolors
+import matplotlib.pyplot as plt
+import numpy as np
+
+# Graphs with more vertices and edges together are drawn by render_density instead of ig.plot
+RASTER_THRESHOLD = 20_000
+
+
+def should_rasterize(number_of_vertices: int, number_of_edges: int, raster_threshold: int = RASTER_THRESHOLD):
+    return raster_threshold is not None and number_of_vertices + number_of_edges > raster_threshold
+
+
+def raster_filename(output_filename: str):
+    return os.path.splitext(output_filename)[0] + ".png"
+
+
+def to_pixels(coords: np.ndarray, width: int, height: int, margin: int):
+    # Layout coordinates scaled into the image, y axis pointing down as in ig.plot
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    low = coords.min(axis=0) if coords.size > 0 else np.zeros(2)
+    span = np.ptp(coords, axis=0) if coords.size > 0 else np.ones(2)
+    scale = min((width - 2 * margin) / max(span[0], 1e-12), (height - 2 * margin) / max(span[1], 1e-12))
+    return (coords - low) * scale + margin
+
+
+def accumulate_edges(pixels: np.ndarray, edges: np.ndarray, width: int, height: int, max_edges_per_chunk: int = 1 << 20):
+    # Number of edges passing through every pixel. Each edge is sampled about once per pixel of its length,
+    # but all edges together at most about 4 times per pixel of the image.
+    counts = np.zeros(width * height, dtype=np.float64)
+    max_points_per_edge = max(2, 4 * width * height // max(edges.shape[0], 1))
+    for start in range(0, edges.shape[0], max_edges_per_chunk):
+        chunk = edges[start:start + max_edges_per_chunk]
+        sources, targets = pixels[chunk[:, 0]], pixels[chunk[:, 1]]
+        lengths = np.ceil(np.abs(targets - sources).max(axis=1)).astype(np.int64) + 1
+        lengths = np.minimum(lengths, max_points_per_edge)
+        edge_ids = np.repeat(np.arange(chunk.shape[0]), lengths)
+        steps = np.arange(edge_ids.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        t = (steps / np.maximum(lengths - 1, 1)[edge_ids])[:, None]
+        points = (sources[edge_ids] * (1 - t) + targets[edge_ids] * t).astype(np.int64)
+        counts += np.bincount(points[:, 1] * width + points[:, 0], minlength=counts.size)
+    return counts.reshape(height, width)
+
+
+def render_density(coords: np.ndarray, edges: np.ndarray, output_filename: str, vertex_colors: list = None,
+                   edge_color: str = "gray", width: int = 2000, height: int = 2000, vertex_radius: int = 1):
+    # Edges and vertices are binned into pixel buffers and the image is written as PNG,
+    # so time and file size grow with number of pixels instead of number of elements
+    margin = vertex_radius + 1
+    pixels = to_pixels(coords, width, height, margin)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+    # Edge density on log scale as opacity of edge color over white background
+    density = np.log1p(accumulate_edges(pixels, edges, width, height))
+    opacity = (density / density.max() if density.max() > 0 else density)[:, :, None]
+    image = np.ones((height, width, 3)) * (1 - opacity) + np.array(mcolors.to_rgb(edge_color)) * opacity
+
+    # Vertices as squares of vertex_radius, pixel gets mean color of vertices covering it
+    if vertex_colors is None:
+        vertex_colors = ["red"] * pixels.shape[0]
+    colors = mcolors.to_rgba_array(vertex_colors)[:, :3]
+    centres = pixels.astype(np.int64)
+    offsets = np.arange(-vertex_radius, vertex_radius + 1)
+    color_sums = np.zeros((width * height, 3))
+    covered = np.zeros(width * height)
+    for dy in offsets:
+        for dx in offsets:
+            positions = (centres[:, 1] + dy) * width + centres[:, 0] + dx
+            covered += np.bincount(positions, minlength=covered.size)
+            for channel in range(3):
+                color_sums[:, channel] += np.bincount(positions, weights=colors[:, channel], minlength=covered.size)
+    has_vertex = covered > 0
+    image.reshape(-1, 3)[has_vertex] = color_sums[has_vertex] / covered[has_vertex, None]
+
+    plt.imsave(output_filename, np.clip(image, 0, 1))
@@ -0,0 +1,143 @@
+import csv
+import os
+
+import numpy as np
+import pandas as pd
+
+# pyarrow is optional, without it results are written to CSV
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Columns of results file and their types. Run was simulated in a batch seeded by
+# SeedSequence(seed, spawn_key=(c, k, first_run)), first_run is the first run of the batch.
+RESULT_COLUMNS = {
+    "ratio": "float64",
+    "k": "int64",
+    "c": "int64",
+    "run": "int64",
+    "seed": "int64",
+    "first_run": "int64",
+    "timesteps": "int64",
+    "wall_time": "float64",
+}
+
+
+def results_filepath(filepath_without_extension: str):
+    # Parquet if pyarrow is installed, CSV otherwise
+    if pa is not None:
+        return filepath_without_extension + ".parquet"
+    return filepath_without_extension + ".csv"
+
+
+def log_cell_to_file(filepath: str, max_candidates: int, number_of_vertices: int, number_of_runs: int, mean_ratio: float, half_width: float,
+                     seed: int, first_runs: list):
+    # Batches of cell were seeded by SeedSequence(seed, spawn_key=(c, k, first_run)) for each of first_runs
+    with open(filepath, "a") as file:
+        file.write(f"{max_candidates};{number_of_vertices};{number_of_runs};{mean_ratio};{half_width};{seed};"
+                   f"{','.join(str(first_run) for first_run in first_runs)}\n")
+
+
+def get_file_format(filepath: str):
+    extension = os.path.splitext(filepath)[1]
+    if extension == ".parquet":
+        return "parquet"
+    if extension in (".arrow", ".feather"):
+        return "ipc"
+    if extension == ".csv":
+        return "csv"
+    if extension == ".txt":
+        return "log"
+    raise ValueError(f"Unknown results file format: {filepath}")
+
+
+class ResultsWriter:
+    def __init__(self, filepath: str, batch_size: int = 100_000):
+        # Rows are buffered per column and written in batches of batch_size rows
+        self.filepath = filepath
+        self.file_format = get_file_format(filepath)
+        if self.file_format == "log":
+            raise ValueError("Results are not written in old log format, use .parquet, .arrow or .csv")
+        if self.file_format != "csv" and pa is None:
+            raise ImportError(f"pyarrow is required to write {filepath}")
+        self.batch_size = batch_size
+        self.buffer = {column: [] for column in RESULT_COLUMNS}
+        self.writer = None
+        self.file = None
+
+        if self.file_format == "csv":
+            self.file = open(filepath, "w", newline="")
+            self.writer = csv.writer(self.file, delimiter=";")
+            self.writer.writerow(RESULT_COLUMNS)
+        else:
+            self.schema = pa.schema([(column, pa.from_numpy_dtype(np.dtype(dtype))) for column, dtype in RESULT_COLUMNS.items()])
+            if self.file_format == "parquet":
+                self.writer = pq.ParquetWriter(filepath, self.schema)
+            else:
+                self.file = pa.OSFile(filepath, "wb")
+                self.writer = ipc.new_file(self.file, self.schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, ratio: float, k: int, c: int, run: int, seed: int, first_run: int, timesteps: int, wall_time: float):
+        for column, value in zip(RESULT_COLUMNS, (ratio, k, c, run, seed, first_run, timesteps, wall_time)):
+            self.buffer[column].append(value)
+        if len(self.buffer["ratio"]) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer["ratio"]:
+            return
+        if self.file_format == "csv":
+            self.writer.writerows(zip(*self.buffer.values()))
+            self.file.flush()
+        else:
+            batch = pa.record_batch([pa.array(np.asarray(values, dtype=RESULT_COLUMNS[column]))
+                                     for column, values in self.buffer.items()], schema=self.schema)
+            self.writer.write_batch(batch)
+        self.buffer = {column: [] for column in RESULT_COLUMNS}
+
+    def close(self):
+        self.flush()
+        if self.file_format != "csv":
+            self.writer.close()
+        if self.file is not None:
+            self.file.close()
+
+
+def read_results(filepath: str, columns: list = None):
+    # Loads only given columns. Old semicolon log.txt files have only ratio, k and c.
+    file_format = get_file_format(filepath)
+    if file_format == "parquet":
+        return pd.read_parquet(filepath, columns=columns)
+    if file_format == "ipc":
+        return feather.read_table(filepath, columns=columns).to_pandas()
+    if file_format == "csv":
+        return pd.read_csv(filepath, sep=";", usecols=columns, dtype=RESULT_COLUMNS)
+    return pd.read_csv(filepath, sep=";", names=["ratio", "k", "c"], usecols=columns)
+
+
+def iter_results(filepath: str, columns: list = None, chunksize: int = 1_000_000):
+    # Same as read_results, but yields data frames of at most chunksize rows
+    file_format = get_file_format(filepath)
+    if file_format == "parquet":
+        for batch in pq.ParquetFile(filepath).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    elif file_format == "ipc":
+        with pa.memory_map(filepath, "r") as source:
+            reader = ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield (batch if columns is None else batch.select(columns)).to_pandas()
+    elif file_format == "csv":
+        yield from pd.read_csv(filepath, sep=";", usecols=columns, dtype=RESULT_COLUMNS, chunksize=chunksize)
+    else:
+        yield from pd.read_csv(filepath, sep=";", names=["ratio", "k", "c"], usecols=columns, chunksize=chunksize)
@@ -0,0 +1,92 @@
+import heapq
+import math
+
+import numpy as np
+
+from CSRGraph import CSRGraph, LANES_DTYPE
+from LiveEdgeSamples import LiveEdgeSamples
+from RRSets import RRSets
+
+# Cascades evaluated together keep a table of lanes of (cascade, vertex) pairs with at most this many entries
+MAX_BLOCK_VISITED = 1 << 24
+
+
+def marginal_gains(live_edge_samples: LiveEdgeSamples, vertices: np.ndarray, infected: np.ndarray, timesteps: int):
+    # Expected ratio of vertices newly infected by adding each of vertices to seeds which already infected infected[word].
+    # Cascade of vertex runs in the same samples as cascades of seeds, only vertices outside them are counted.
+    n = live_edge_samples.csr.get_number_of_vertices()
+    vertices = np.asarray(vertices, dtype=np.int64)
+    block_size = max(1, MAX_BLOCK_VISITED // n)
+    totals = np.zeros(vertices.size, dtype=np.int64)
+    for start in range(0, vertices.size, block_size):
+        for word in range(infected.shape[0]):
+            totals[start:start + block_size] += live_edge_samples.count_reached(word, vertices[start:start + block_size], timesteps, infected[word])
+    return totals / (live_edge_samples.number_of_samples * n)
+
+
+def celf(live_edge_samples: LiveEdgeSamples, max_candidates: int, timesteps: int, candidates: np.ndarray = None):
+    # Lazy greedy influence maximization (CELF). Spread is submodular, so marginal gain computed in earlier round
+    # is an upper bound and vertex is re-evaluated only when it gets to the top of the queue.
+    # Returns seeds in order of selection and their marginal gains as ratio of vertices.
+    csr = live_edge_samples.csr
+    if candidates is None:
+        candidates = np.arange(csr.get_number_of_vertices())
+    # Vertices infected by selected seeds in each sample
+    infected = np.zeros((live_edge_samples.masks.shape[0], csr.get_number_of_vertices()), dtype=LANES_DTYPE)
+
+    # Queue of (-gain, vertex, number of seeds when gain was computed), first gains of all candidates in bulk
+    gains = marginal_gains(live_edge_samples, candidates, infected, timesteps)
+    queue = [(-gain, int(vertex), 0) for gain, vertex in zip(gains, candidates)]
+    heapq.heapify(queue)
+
+    seeds = []
+    gains = []
+    while queue and len(seeds) < max_candidates:
+        gain, vertex, round_of_gain = heapq.heappop(queue)
+        if round_of_gain == len(seeds):
+            seeds.append(vertex)
+            gains.append(-gain)
+            for word in range(infected.shape[0]):
+                number_of_lanes = live_edge_samples.get_number_of_lanes(word)
+                reached, _ = live_edge_samples.reach(word, [[vertex]] * number_of_lanes, timesteps)
+                infected[word] |= reached
+        else:
+            gain = marginal_gains(live_edge_samples, [vertex], infected, timesteps)[0]
+            heapq.heappush(queue, (-gain, vertex, len(seeds)))
+    return np.array(seeds, dtype=np.int64), np.array(gains)
+
+
+def log_binomial(n: int, k: int):
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def imm(csr: CSRGraph, max_candidates: int, p: float, timesteps: int, rng: np.random.Generator, epsilon: float = 0.5, l: float = 1.0):
+    # IMM (Tang, Shi, Xiao 2015): number of RR sets is chosen so that greedy seeds are (1 - 1/e - epsilon)-approximate
+    # with probability at least 1 - 1/n^l. Returns seeds, their marginal gains as ratio of vertices and the RR sets.
+    n = csr.get_number_of_vertices()
+    k = min(max_candidates, n)
+    if n < 2:
+        rr_sets = RRSets.sample(csr, 1, p, timesteps, rng)
+        return (*rr_sets.select_seeds(k), rr_sets)
+    l = l * (1 + math.log(2) / math.log(n))
+    log_binomial_n_k = log_binomial(n, k)
+
+    # Lower bound of the optimal spread, from guesses n / 2, n / 4, ...
+    epsilon_prime = math.sqrt(2) * epsilon
+    lambda_prime = (2 + 2 / 3 * epsilon_prime) * (log_binomial_n_k + l * math.log(n) + math.log(math.log2(n))) * n / epsilon_prime ** 2
+    rr_sets = RRSets.sample(csr, 0, p, timesteps, rng)
+    lower_bound = 1.0
+    for i in range(1, int(math.log2(n))):
+        x = n / 2 ** i
+        rr_sets.extend(math.ceil(lambda_prime / x), rng)
+        seeds, _ = rr_sets.select_seeds(k)
+        spread = n * rr_sets.estimate_spread(seeds)
+        if spread >= (1 + epsilon_prime) * x:
+            lower_bound = spread / (1 + epsilon_prime)
+            break
+
+    alpha = math.sqrt(l * math.log(n) + math.log(2))
+    beta = math.sqrt((1 - 1 / math.e) * (log_binomial_n_k + l * math.log(n) + math.log(2)))
+    lambda_star = 2 * n * ((1 - 1 / math.e) * alpha + beta) ** 2 / epsilon ** 2
+    rr_sets.extend(math.ceil(lambda_star / lower_bound), rng)
+    return (*rr_sets.select_seeds(k), rr_sets)
@@ -0,0 +1,71 @@
+import numpy as np
+
+from results import iter_results
+
+
+class HistogramSketch:
+    def __init__(self, number_of_bins: int = 1 << 14, low: float = 0.0, high: float = 1.0):
+        # Fixed-width histogram of values in [low, high], memory does not grow with number of values.
+        # Quantiles are exact up to width of one bin.
+        self.counts = np.zeros(number_of_bins, dtype=np.int64)
+        self.low = low
+        self.high = high
+        self.minimum = np.inf
+        self.maximum = -np.inf
+
+    def get_count(self):
+        return int(self.counts.sum())
+
+    def get_bin_width(self):
+        return (self.high - self.low) / self.counts.size
+
+    def add(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        bins = ((values - self.low) / self.get_bin_width()).astype(np.int64)
+        self.counts += np.bincount(np.clip(bins, 0, self.counts.size - 1), minlength=self.counts.size)
+        self.minimum = min(self.minimum, values.min())
+        self.maximum = max(self.maximum, values.max())
+
+    def get_values_of_bins(self, bins: np.ndarray):
+        # Centre of bin, clipped to observed range so extremes are exact
+        return np.clip(self.low + (bins + 0.5) * self.get_bin_width(), self.minimum, self.maximum)
+
+    def quantile(self, q: float):
+        # Linear interpolation between order statistics, the same as np.percentile
+        cumulative = np.cumsum(self.counts)
+        position = q * (cumulative[-1] - 1)
+        lower, upper = int(np.floor(position)), int(np.ceil(position))
+        values = self.get_values_of_bins(np.searchsorted(cumulative, [lower + 1, upper + 1]))
+        return values[0] + (values[1] - values[0]) * (position - lower)
+
+    def get_box_stats(self, label: str, whis: float = 1.5):
+        # Quartiles, whiskers at most whis * IQR from box and outliers as accepted by Axes.bxp.
+        # Outliers are one point per non-empty histogram bin, so their number is bounded.
+        q1, median, q3 = self.quantile(0.25), self.quantile(0.5), self.quantile(0.75)
+        iqr = q3 - q1
+        non_empty = np.flatnonzero(self.counts)
+        values = self.get_values_of_bins(non_empty)
+        inside = (values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)
+        return {
+            "label": label,
+            "med": median,
+            "q1": q1,
+            "q3": q3,
+            "whislo": values[inside].min() if inside.any() else q1,
+            "whishi": values[inside].max() if inside.any() else q3,
+            "fliers": values[~inside],
+        }
+
+
+def summarize_results(filepath: str, value_column: str = "ratio", group_columns: tuple = ("k", "c"), chunksize: int = 1_000_000):
+    # One pass over results file, returns sketch of value_column for each group in order of first appearance
+    summaries = {}
+    for chunk in iter_results(filepath, columns=[value_column, *group_columns], chunksize=chunksize):
+        for group, values in chunk.groupby(list(group_columns), sort=False)[value_column]:
+            group = tuple(int(key) for key in group)
+            if group not in summaries:
+                summaries[group] = HistogramSketch()
+            summaries[group].add(values.to_numpy())
+    return summaries
@@ -0,0 +1,223 @@
+import argparse
+import importlib.util
+import os
+import sys
+
+# Heavy modules (igraph, NumPy, pandas, matplotlib, seaborn) are imported only inside the subcommand that needs them,
+# so --help and argument errors return at once
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CV2 = os.path.join(ROOT, "lectures", "cv2_py_plotting")
+CV6 = os.path.join(ROOT, "lectures", "cv6")
+CV7 = os.path.join(ROOT, "lectures", "cv7_influenceInNetworks")
+YAHOO = os.path.join(ROOT, "Project_Yahoo_all", "Project_Yahoo_all", "python")
+
+
+def use_directory(directory: str):
+    # Modules of one lecture import each other by name
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+
+
+def load_script(directory: str, name: str):
+    # Several lectures have main.py, each is loaded under its own module name
+    use_directory(directory)
+    spec = importlib.util.spec_from_file_location(f"{os.path.basename(directory)}_{name}", os.path.join(directory, f"{name}.py"))
+    module = importlib.util.module_from_spec(spec)
+    # Registered before it runs, so its functions can be pickled by name and sent to worker processes
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def get_graph_kwargs(arguments: argparse.Namespace):
+    # Arguments of cv7 Graph, the same dict is sent to worker processes of sweep
+    name_of_network = arguments.name or os.path.basename(arguments.graph).split(".")[0]
+    return {"filepath": arguments.graph, "name_of_network": name_of_network, "weighted": arguments.weighted,
+            "directed": arguments.directed, "out_of_core": arguments.out_of_core}
+
+
+def simulate(arguments: argparse.Namespace):
+    use_directory(CV7)
+    import random
+    from Graph import Graph
+
+    # Candidates are sampled by random module, simulation draws from numpy generator
+    random.seed(arguments.seed)
+    # Candidates are chosen from all vertices unless --c or --portion-of-vertices is given, the same as cv7 main.py
+    portion_of_vertices = 1.0 if arguments.c is None and arguments.portion_of_vertices is None else arguments.portion_of_vertices
+    g = Graph(**get_graph_kwargs(arguments), seed=arguments.seed)
+    print(f"Number of vertices: {g.get_number_of_vertices()}")
+    print(f"Number of edges: {g.get_number_of_edges()}")
+    ratio = g.IC_simulation(p=arguments.p, timesteps=arguments.timesteps, max_candidates=arguments.k,
+                            portion_of_vertices=portion_of_vertices, number_of_vertices=arguments.c,
+                            degree_percentile=arguments.degree_percentile,
+                            clustering_coefficient_threshold=arguments.clustering_coefficient_threshold,
+                            enable_plotting=arguments.plot, engine=arguments.engine, plot_format=arguments.plot_format,
+                            seed_selection=arguments.seed_selection, number_of_samples=arguments.samples, pool_size=arguments.pool_size or None,
+                            epsilon=arguments.epsilon, verbosity=arguments.verbosity)
+    print(f"Portion of infected vertices: {ratio}")
+
+
+def sweep(arguments: argparse.Namespace):
+    use_directory(CV7)
+    from experiment import run_adaptive_grid
+    from results import ResultsWriter, log_cell_to_file, results_filepath
+
+    os.makedirs(os.path.dirname(arguments.output) or ".", exist_ok=True)
+    with ResultsWriter(results_filepath(arguments.output)) as results:
+        # (c, k) cells simulated on all cores, each until its mean ratio is known to +-tolerance
+        for number_of_vertices, max_candidates, rows, number_of_runs, mean_ratio, half_width in run_adaptive_grid(
+                get_graph_kwargs(arguments), arguments.c, arguments.k, tolerance=arguments.tolerance, min_runs=arguments.min_runs,
+                max_runs=arguments.max_runs, seed=arguments.seed, max_workers=arguments.workers, p=arguments.p,
+                timesteps=arguments.timesteps, portion_of_vertices=None, degree_percentile=arguments.degree_percentile,
+                clustering_coefficient_threshold=arguments.clustering_coefficient_threshold):
+            for run, ratio, timesteps, wall_time, first_run in rows:
+                results.write(ratio, max_candidates, number_of_vertices, run, arguments.seed, first_run, timesteps, wall_time)
+            log_cell_to_file(arguments.output + "_cells.txt", max_candidates, number_of_vertices, number_of_runs, mean_ratio, half_width,
+                             arguments.seed, sorted({row[4] for row in rows}))
+            print(f"c={number_of_vertices}, k={max_candidates}: {mean_ratio} +- {half_width} after {number_of_runs} runs")
+
+
+def plot_influence(arguments: argparse.Namespace):
+    plot = load_script(CV7, "plot")
+    from results import results_filepath
+    from summaries import summarize_results
+
+    # Results are read only once for all plots
+    summaries = summarize_results(results_filepath(arguments.results))
+    os.makedirs(arguments.output_directory, exist_ok=True)
+    for k in arguments.k:
+        plot.plot_boxplots(summaries, os.path.join(arguments.output_directory, f"plot_k{k}.pdf"), k)
+
+
+def plot_temporal(arguments: argparse.Namespace):
+    input_filepaths = list(arguments.inputs)
+    if arguments.dblp_directory is not None:
+        use_directory(CV2)
+        from temporal_metrics import group_by_year, read_dblp_simplices, write_dblp_metrics
+
+        # CSVs are regenerated from coauth-DBLP stream in one pass
+        events_by_year = group_by_year(read_dblp_simplices(arguments.dblp_directory))
+        os.makedirs(arguments.output_directory, exist_ok=True)
+        for filename, window_length in [("outputsPerOneYears.csv", 1), ("outputsPerTenYears.csv", 10)]:
+            input_filepath = os.path.join(arguments.output_directory, filename)
+            write_dblp_metrics(events_by_year, input_filepath, window_length)
+            input_filepaths.append(input_filepath)
+    if input_filepaths:
+        dblp = load_script(CV2, "main")
+        for input_filepath in input_filepaths:
+            dblp.plot_data(input_filepath, os.path.splitext(input_filepath)[0] + ".pdf")
+
+    if arguments.report is not None:
+        report = load_script(YAHOO, "main")
+        rendered, skipped = report.build_report(report.TASKS, arguments.report, arguments.workers, arguments.force)
+        print(f"Rendered: {len(rendered)}, up to date: {len(skipped)}")
+
+
+def multiplex(arguments: argparse.Namespace):
+    use_directory(CV6)
+    import numpy as np
+    from communities import detect_communities
+    from functions import load_from_file, plot_communities_flattened, plot_communities_layers, plot_flattened, plot_layers
+    from MultiplexGraph import MultiplexGraph
+
+    g = load_from_file(arguments.filepath)
+    # Layer views are built once and shared by all per layer plots
+    mg = MultiplexGraph(g)
+    os.makedirs("Outputs", exist_ok=True)
+    if not arguments.skip_plots:
+        plot_layers(mg)
+        plot_flattened(g)
+    if not arguments.skip_communities:
+        # Louvain of all layers and of flattened graph run in parallel, results are cached
+        memberships = detect_communities(mg, seed=arguments.seed, multiplex=arguments.multiplex,
+                                         interlayer_coupling=arguments.interlayer_coupling, max_workers=arguments.workers,
+                                         cache_directory=arguments.cache_directory)
+        if not arguments.skip_plots:
+            plot_communities_layers(mg, memberships)
+            plot_communities_flattened(g, memberships["flattened"])
+        # With --multiplex layers keep labels of supra graph, so communities shared by layers have the same label
+        for name, membership in memberships.items():
+            print(f"{name}: {np.unique(membership).size} communities")
+
+
+def add_graph_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("graph", help="edge list (\"from to weight\" lines) or Matrix Market file, optionally .gz")
+    parser.add_argument("--name", help="name of network used in output files, file name by default")
+    parser.add_argument("--unweighted", dest="weighted", action="store_false", help="ignore third column")
+    parser.add_argument("--directed", action="store_true")
+    parser.add_argument("--out-of-core", action="store_true", help="build cached CSR in chunks and use it memory-mapped")
+
+
+def add_candidate_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--p", type=float, default=0.01, help="probability of infection over one edge")
+    parser.add_argument("--timesteps", type=int, default=1000)
+    parser.add_argument("--degree-percentile", type=float, default=90.0)
+    parser.add_argument("--clustering-coefficient-threshold", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog="mas2", description="Simulations and plots of MAS2 lectures and projects.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_simulate = subparsers.add_parser("simulate", help="one independent cascade simulation (cv7)")
+    add_graph_arguments(parser_simulate)
+    add_candidate_arguments(parser_simulate)
+    parser_simulate.add_argument("--k", type=int, default=2, help="maximal number of candidates")
+    chosen_from = parser_simulate.add_mutually_exclusive_group()
+    chosen_from.add_argument("--c", type=int, help="number of vertices candidates are chosen from")
+    chosen_from.add_argument("--portion-of-vertices", type=float, help="portion of vertices candidates are chosen from, 1.0 by default")
+    parser_simulate.add_argument("--engine", choices=["csr", "igraph"], default="csr")
+    parser_simulate.add_argument("--seed-selection", choices=["heuristic", "celf", "imm"], default="heuristic")
+    parser_simulate.add_argument("--samples", type=int, default=256, help="live-edge samples of celf")
+    parser_simulate.add_argument("--pool-size", type=int, default=100, help="vertices of highest degree considered by celf, 0 for all")
+    parser_simulate.add_argument("--epsilon", type=float, default=0.5, help="approximation parameter of imm")
+    parser_simulate.add_argument("--plot", action="store_true", help="plot every timestep to Outputs")
+    parser_simulate.add_argument("--plot-format", choices=["pdf", "gif", "multipage"], default="pdf")
+    parser_simulate.add_argument("--verbosity", type=int, default=1)
+    parser_simulate.set_defaults(function=simulate)
+
+    parser_sweep = subparsers.add_parser("sweep", help="(c, k) grid of simulations on all cores (cv7)")
+    add_graph_arguments(parser_sweep)
+    add_candidate_arguments(parser_sweep)
+    parser_sweep.add_argument("--c", nargs="+", type=int, default=[100, 200, 500, 1000], help="numbers of vertices")
+    parser_sweep.add_argument("--k", nargs="+", type=int, default=[10, 2, 4], help="numbers of candidates")
+    parser_sweep.add_argument("--tolerance", type=float, default=0.002, help="half width of confidence interval of mean ratio")
+    parser_sweep.add_argument("--min-runs", type=int, default=128)
+    parser_sweep.add_argument("--max-runs", type=int, default=1000)
+    parser_sweep.add_argument("--workers", type=int)
+    parser_sweep.add_argument("--output", default="Outputs/results", help="results file without extension")
+    parser_sweep.set_defaults(function=sweep)
+
+    parser_plot_influence = subparsers.add_parser("plot-influence", help="box plots of sweep results (cv7)")
+    parser_plot_influence.add_argument("--results", default="Outputs/results", help="results file without extension")
+    parser_plot_influence.add_argument("--k", nargs="+", type=int, default=[2, 4, 10])
+    parser_plot_influence.add_argument("--output-directory", default="Outputs")
+    parser_plot_influence.set_defaults(function=plot_influence)
+
+    parser_plot_temporal = subparsers.add_parser("plot-temporal", help="metrics of time windows (cv2) and Yahoo/US Patents report")
+    parser_plot_temporal.add_argument("inputs", nargs="*", help="CSVs of window metrics, each plotted into PDF next to it")
+    parser_plot_temporal.add_argument("--dblp-directory", help="regenerate and plot window metrics of coauth-DBLP")
+    parser_plot_temporal.add_argument("--output-directory", default="Outputs", help="where regenerated CSVs are written")
+    parser_plot_temporal.add_argument("--report", metavar="DATA_ROOT", help="build figures of Yahoo/US Patents report")
+    parser_plot_temporal.add_argument("--workers", type=int)
+    parser_plot_temporal.add_argument("--force", action="store_true", help="rebuild all figures of report")
+    parser_plot_temporal.set_defaults(function=plot_temporal)
+
+    parser_multiplex = subparsers.add_parser("multiplex", help="layers and communities of multiplex network (cv6)")
+    parser_multiplex.add_argument("filepath", help=".mpx file")
+    parser_multiplex.add_argument("--multiplex", action="store_true", help="one Louvain run on supra graph of all layers")
+    parser_multiplex.add_argument("--interlayer-coupling", type=float, default=1.0)
+    parser_multiplex.add_argument("--seed", type=int, default=0)
+    parser_multiplex.add_argument("--workers", type=int)
+    parser_multiplex.add_argument("--cache-directory", default="Outputs")
+    parser_multiplex.add_argument("--skip-plots", action="store_true")
+    parser_multiplex.add_argument("--skip-communities", action="store_true")
+    parser_multiplex.set_defaults(function=multiplex)
+    return parser
+
+
+if __name__ == '__main__':
+    arguments = get_parser().parse_args()
+    arguments.function(arguments)
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Modules of cv7 import each other by name, the same as when its scripts are run from their directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CV7 = os.path.join(ROOT, "lectures", "cv7_influenceInNetworks")
+if CV7 not in sys.path:
+    sys.path.insert(0, CV7)
@@ -0,0 +1,29 @@
+import errno
+import os
+import stat
+
+import numpy as np
+
+import cache
+from Graph import Graph
+
+
+def test_graph_loads_from_read_only_directory(tmp_path, monkeypatch):
+    directory = tmp_path / "data"
+    directory.mkdir()
+    (directory / "graph.txt").write_text("a b 1\nb c 2\nc a 3\nc d 1\n")
+    directory.chmod(stat.S_IRUSR | stat.S_IXUSR)
+    if os.access(directory, os.W_OK):
+        # Root writes anyway, writing cache fails the way it does for other users
+        def read_only(path, *args, **kwargs):
+            raise PermissionError(errno.EACCES, "Permission denied", path)
+        monkeypatch.setattr(cache.os, "makedirs", read_only)
+    try:
+        g = Graph(filepath=str(directory / "graph.txt"))
+        assert g.get_number_of_vertices() == 4
+        assert g.get_number_of_edges() == 4
+        assert g.weights.tolist() == [1, 2, 3, 1]
+        assert np.array_equal(g.get_structural_index()[0], [2, 2, 3, 1])
+        assert sorted(os.listdir(directory)) == ["graph.txt"]
+    finally:
+        directory.chmod(stat.S_IRWXU)
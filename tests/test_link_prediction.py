@@ -0,0 +1,22 @@
+import numpy as np
+
+from CSRGraph import CSRGraph
+from link_prediction import evaluate_link_prediction, predict_links
+
+
+def test_no_links_are_predicted_for_k_zero():
+    csr = CSRGraph.from_edges(4, np.array([0, 1, 1]), np.array([1, 2, 3]))
+    edges, scores = predict_links(csr, "adamic_adar", k=0)
+    assert edges.shape == (0, 2)
+    assert scores.size == 0
+
+    edges, scores = predict_links(csr, "common_neighbors", k=1)
+    assert edges.tolist() == [[0, 2]]
+    assert scores.tolist() == [1.0]
+
+
+def test_evaluation_without_held_out_edges():
+    # Portion so small that no edge is held out, nothing is predicted and the training graph is the whole graph
+    edges = np.array([[0, 1], [1, 2], [1, 3], [2, 3]])
+    confusion_matrix = evaluate_link_prediction(edges, 4, np.random.default_rng(0), portion_of_edges=1e-5)
+    assert confusion_matrix == {"TP": 4, "FN": 0, "FP": 0, "TN": 2}
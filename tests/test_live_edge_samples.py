@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from CSRGraph import CSRGraph, NUMBER_OF_LANES
+from LiveEdgeSamples import LiveEdgeSamples
+from experiment import run_adaptive_grid, run_grid
+
+
+def make_samples(number_of_samples: int):
+    csr = CSRGraph.from_edges(5, np.array([0, 1, 2, 3]), np.array([1, 2, 3, 4]))
+    return LiveEdgeSamples.sample(csr, number_of_samples, 1.0, np.random.default_rng(0))
+
+
+def test_every_run_gets_its_own_sample():
+    samples = make_samples(NUMBER_OF_LANES + 6)
+    # Runs cross the boundary of words of samples
+    ratios, timesteps_used = samples.evaluate_runs([[0]] * 10, 3, first_sample=NUMBER_OF_LANES - 4)
+    assert ratios.tolist() == [0.4] * 10
+    assert timesteps_used.tolist() == [2] * 10
+
+
+def test_more_runs_than_samples_are_rejected():
+    samples = make_samples(8)
+    samples.evaluate_runs([[0]] * 8, 3)
+    with pytest.raises(ValueError):
+        samples.evaluate_runs([[0]] * 9, 3)
+    with pytest.raises(ValueError):
+        samples.evaluate_runs([[0]] * 2, 3, first_sample=7)
+
+
+def test_grids_reject_more_runs_than_saved_samples():
+    live_edge_samples_kwargs = {"filepath": "samples.npy", "number_of_samples": 8, "p": 1.0}
+    with pytest.raises(ValueError):
+        next(run_grid({}, [10], [1], 9, live_edge_samples_kwargs=live_edge_samples_kwargs))
+    with pytest.raises(ValueError):
+        next(run_adaptive_grid({}, [10], [1], 0.01, min_runs=1, max_runs=9, live_edge_samples_kwargs=live_edge_samples_kwargs))
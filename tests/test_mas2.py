@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+
+def run_mas2(*arguments: str, cwd: str):
+    return subprocess.run([sys.executable, os.path.join(ROOT, "mas2.py"), *arguments], cwd=cwd, capture_output=True, text=True)
+
+
+def test_report_is_rendered_in_worker_processes(tmp_path):
+    # Figures of report are rendered in a process pool, which pickles functions of Yahoo main.py
+    for project in ("Project_USPatents", "Project_Yahoo"):
+        directory = tmp_path / project / "Outputs"
+        directory.mkdir(parents=True)
+        (directory / "nodesAndEdges.csv").write_text("Year;Nodes;Edges\n1;10;20\n2;15;40\n")
+
+    result = run_mas2("plot-temporal", "--report", str(tmp_path), "--workers", "2", cwd=str(tmp_path))
+    assert result.returncode == 0, result.stderr
+    assert "Rendered: 2, up to date: 0" in result.stdout
+    assert (tmp_path / "Project_USPatents" / "Outputs" / "nodesAndEdges.pdf").exists()
+    assert (tmp_path / "Project_Yahoo" / "Outputs" / "nodesAndEdges.pdf").exists()
+
+    result = run_mas2("plot-temporal", "--report", str(tmp_path), "--workers", "2", cwd=str(tmp_path))
+    assert result.returncode == 0, result.stderr
+    assert "Rendered: 0, up to date: 2" in result.stdout
+
+
+def test_simulate_chooses_candidates_from_all_vertices_by_default(tmp_path):
+    (tmp_path / "star.txt").write_text("".join(f"0 {vertex}\n" for vertex in range(1, 30)))
+    result = run_mas2("simulate", str(tmp_path / "star.txt"), "--unweighted", "--p", "1.0", "--timesteps", "10",
+                      "--verbosity", "0", cwd=str(tmp_path))
+    assert result.returncode == 0, result.stderr
+    assert "Portion of infected vertices: 1.0" in result.stdout